@@ -1,10 +1,40 @@
+"""Transfer dashboard over the "Form Responses 1" Google Sheet.
+
+    streamlit run app.py    the dashboard; with DASHBOARD_API_PORT set it also
+                            serves the JSON API, from the first page view on
+    python app.py api       the JSON API alone, no browser session needed
+"""
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from datetime import datetime, timedelta
 import time
+import threading
+import os
+import sys
+import shutil
+import re
+import json
+import hashlib
+import hmac
+import html
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+from contextlib import contextmanager
+import pyarrow as pa
+import pyarrow.parquet as pq
+import uvicorn
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+import streamlit.components.v1 as components
 
 st.set_page_config(
     page_title="Sales Transfer Dashboard",
@@ -13,11 +43,13 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# On-disk state: the data snapshot and the published theme assets
+CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
 # ============================================================
 # NEURAL NETWORK CANVAS + FULL CSS
 # ============================================================
-st.markdown("""
-<style>
+THEME_CSS = """
 @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&display=swap');
 * { font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif; color: #FFFFFF !important; }
 
@@ -623,23 +655,57 @@ p, span, label, div, td, th, li, a, h1, h2, h3, h4, h5, h6, strong, em, b, i, sm
     --danger: #EF4444;
     --glow: rgba(79,70,229,0.4);
 }
-</style>
-<!-- NEURAL NETWORK CANVAS -->
-<canvas id="neural-canvas"></canvas>
-<script>
+
+/* Low-power mode (body.low-power): no canvas and none of the infinite animations */
+body.low-power #neural-canvas { display: none !important; }
+body.low-power .main-header, body.low-power .admin-header, body.low-power .main-header::before,
+body.low-power .main-header::after, body.low-power .live-dot, body.low-power .section-dot { animation: none !important; }
+"""
+
+# Background network: dots bucketed into a MAX_DIST grid so only neighbouring
+# cells are compared, glow/core drawn from pre-rendered sprites, links batched
+# into a few alpha levels, capped at FPS and paused while the tab is hidden
+# or the page is in low-power mode. Runs in the app page (see THEME_LOADER).
+NEURAL_JS = """
 (function() {
-    const canvas = document.getElementById('neural-canvas');
-    if (!canvas) return;
+    if (document.getElementById('neural-canvas')) return;
+    const canvas = document.createElement('canvas');
+    canvas.id = 'neural-canvas';
+    (document.querySelector('.stApp') || document.body).prepend(canvas);
     const ctx = canvas.getContext('2d');
-    let W, H;
+    const NUM = 80;
+    const MAX_DIST = 150;
+    const FPS = 30;
+    const LEVELS = 8;
+    let W, H, cols, rows, cells;
     function resize() {
         W = canvas.width = window.innerWidth;
         H = canvas.height = window.innerHeight;
+        cols = Math.ceil(W / MAX_DIST) + 1;
+        rows = Math.ceil(H / MAX_DIST) + 1;
+        cells = Array.from({length: cols * rows}, () => []);
     }
     resize();
     window.addEventListener('resize', resize);
-    const NUM = 80;
-    const MAX_DIST = 150;
+    function sprite(size, paint) {
+        const c = document.createElement('canvas');
+        c.width = c.height = size * 2;
+        paint(c.getContext('2d'), size);
+        return c;
+    }
+    const GLOW = sprite(32, (g, s) => {
+        const grd = g.createRadialGradient(s, s, 0, s, s, s);
+        grd.addColorStop(0, 'rgba(129,140,248,0.3)');
+        grd.addColorStop(1, 'rgba(129,140,248,0)');
+        g.fillStyle = grd;
+        g.arc(s, s, s, 0, Math.PI * 2);
+        g.fill();
+    });
+    const CORE = sprite(16, (g, s) => {
+        g.fillStyle = 'rgb(165,180,252)';
+        g.arc(s, s, s, 0, Math.PI * 2);
+        g.fill();
+    });
     const dots = [];
     for (let i = 0; i < NUM; i++) {
         dots.push({
@@ -650,54 +716,234 @@ p, span, label, div, td, th, li, a, h1, h2, h3, h4, h5, h6, strong, em, b, i, sm
             r: Math.random() * 2 + 1
         });
     }
+    function cell(v, n) { return Math.min(n - 1, Math.max(0, Math.floor(v / MAX_DIST))); }
     function draw() {
         ctx.clearRect(0, 0, W, H);
+        for (const c of cells) c.length = 0;
         for (let i = 0; i < NUM; i++) {
-            for (let j = i + 1; j < NUM; j++) {
-                const dx = dots[i].x - dots[j].x;
-                const dy = dots[i].y - dots[j].y;
-                const dist = Math.sqrt(dx * dx + dy * dy);
-                if (dist < MAX_DIST) {
-                    const alpha = (1 - dist / MAX_DIST) * 0.25;
-                    ctx.beginPath();
-                    ctx.strokeStyle = `rgba(129,140,248,${alpha})`;
-                    ctx.lineWidth = 0.8;
-                    ctx.moveTo(dots[i].x, dots[i].y);
-                    ctx.lineTo(dots[j].x, dots[j].y);
-                    ctx.stroke();
+            const d = dots[i];
+            d.cx = cell(d.x, cols);
+            d.cy = cell(d.y, rows);
+            cells[d.cy * cols + d.cx].push(i);
+        }
+        const paths = Array.from({length: LEVELS}, () => new Path2D());
+        for (let i = 0; i < NUM; i++) {
+            const a = dots[i];
+            for (let y = Math.max(0, a.cy - 1); y <= Math.min(rows - 1, a.cy + 1); y++) {
+                for (let x = Math.max(0, a.cx - 1); x <= Math.min(cols - 1, a.cx + 1); x++) {
+                    for (const j of cells[y * cols + x]) {
+                        if (j <= i) continue;
+                        const b = dots[j];
+                        const dx = a.x - b.x;
+                        const dy = a.y - b.y;
+                        const dist = Math.sqrt(dx * dx + dy * dy);
+                        if (dist < MAX_DIST) {
+                            const p = paths[Math.min(LEVELS - 1, Math.floor((1 - dist / MAX_DIST) * LEVELS))];
+                            p.moveTo(a.x, a.y);
+                            p.lineTo(b.x, b.y);
+                        }
+                    }
                 }
             }
         }
+        ctx.lineWidth = 0.8;
+        for (let l = 0; l < LEVELS; l++) {
+            ctx.strokeStyle = `rgba(129,140,248,${(l + 0.5) / LEVELS * 0.25})`;
+            ctx.stroke(paths[l]);
+        }
         for (let i = 0; i < NUM; i++) {
             const d = dots[i];
-            ctx.beginPath();
-            const grd = ctx.createRadialGradient(d.x, d.y, 0, d.x, d.y, d.r * 4);
-            grd.addColorStop(0, 'rgba(129,140,248,0.3)');
-            grd.addColorStop(1, 'rgba(129,140,248,0)');
-            ctx.fillStyle = grd;
-            ctx.arc(d.x, d.y, d.r * 4, 0, Math.PI * 2);
-            ctx.fill();
-            ctx.beginPath();
-            ctx.fillStyle = `rgba(165,180,252,${0.6 + Math.random() * 0.4})`;
-            ctx.arc(d.x, d.y, d.r, 0, Math.PI * 2);
-            ctx.fill();
+            ctx.globalAlpha = 1;
+            ctx.drawImage(GLOW, d.x - d.r * 4, d.y - d.r * 4, d.r * 8, d.r * 8);
+            ctx.globalAlpha = 0.6 + Math.random() * 0.4;
+            ctx.drawImage(CORE, d.x - d.r, d.y - d.r, d.r * 2, d.r * 2);
             d.x += d.vx;
             d.y += d.vy;
             if (d.x < 0 || d.x > W) d.vx *= -1;
             if (d.y < 0 || d.y > H) d.vy *= -1;
         }
-        requestAnimationFrame(draw);
+        ctx.globalAlpha = 1;
+    }
+    let raf = 0, last = 0;
+    function loop(t) {
+        raf = requestAnimationFrame(loop);
+        if (t - last < 1000 / FPS) return;
+        last = t;
+        draw();
     }
-    draw();
+    const still = window.matchMedia ? window.matchMedia('(prefers-reduced-motion: reduce)') : null;
+    function paused() { return document.hidden || document.body.classList.contains('low-power') || !!(still && still.matches); }
+    function start() { if (!raf && !paused()) raf = requestAnimationFrame(loop); }
+    function stop() { cancelAnimationFrame(raf); raf = 0; }
+    function update() { paused() ? stop() : start(); }
+    document.addEventListener('visibilitychange', update);
+    new MutationObserver(update).observe(document.body, {attributes: true, attributeFilter: ['class']});
+    if (still && still.addEventListener) still.addEventListener('change', update);
+    if (still && still.matches) draw();  // reduced motion: one still frame, never the loop
+    start();
 })();
-</script>
-""", unsafe_allow_html=True)
+"""
+
+# Zero-height component page that links the hashed theme files into the app
+# page and flips body.low-power from its `low_power` argument. Speaks the
+# component message protocol directly (componentReady/render/setFrameHeight).
+THEME_LOADER = """<!doctype html>
+<html><body><script>
+(function() {
+    const doc = window.parent.document;
+    const url = f => new URL(f, window.location.href).href;
+    function add(id, tag, attr, value) {
+        let el = doc.getElementById(id);
+        if (el && el[attr] === value) return;
+        if (!el) { el = doc.createElement(tag); el.id = id; }
+        if (tag === 'link') el.rel = 'stylesheet';
+        el[attr] = value;
+        doc.head.appendChild(el);
+    }
+    function send(type, data) {
+        window.parent.postMessage(Object.assign({isStreamlitMessage: true, type: type}, data), '*');
+    }
+    add('dashboard-theme', 'link', 'href', url('__CSS__'));
+    window.addEventListener('message', e => {
+        if (!e.data || e.data.type !== 'streamlit:render') return;
+        const low = !!(e.data.args || {}).low_power;
+        doc.body.classList.toggle('low-power', low);
+        if (!low) add('dashboard-neural', 'script', 'src', url('__JS__'));
+        send('streamlit:setFrameHeight', {height: 0});
+    });
+    send('streamlit:componentReady', {apiVersion: 1});
+})();
+</script></body></html>
+"""
+THEME_DIR = os.path.join(CACHE_DIR, "theme")
+THEME_MAX_AGE = 7 * 86400  # seconds an unused theme version is kept for pages still linking it
+
+def minify_css(s):
+    s = re.sub(r"/\*.*?\*/", "", s, flags=re.S)
+    s = re.sub(r"\s+", " ", s)
+    s = re.sub(r"\s*([{};,>])\s*", r"\1", s)
+    s = re.sub(r":\s+", ":", s)  # after a colon only: "a :hover" differs from "a:hover"
+    return s.replace(";}", "}").strip()
+
+def minify_js(s):
+    """Indentation and blank lines only; line breaks stay, so ASI is unaffected."""
+    return "\n".join(l.strip() for l in s.splitlines() if l.strip())
+
+@st.cache_resource
+def theme_component():
+    """Publish the theme once per process: the loader page plus minified CSS
+    and JS under content-hashed names, in a directory of their own per theme
+    version (THEME_DIR/<hash>), declared as a component so Streamlit serves
+    them (non-HTML files as Cache-Control: public). A rerun then only sends
+    the component element. Replicas on other versions keep their own
+    directory, and a directory is only pruned once THEME_MAX_AGE unused.
+    None if the directory is not writable (the theme is inlined instead)."""
+    try:
+        files = {}
+        for ext, text in (("css", minify_css(THEME_CSS)), ("js", minify_js(NEURAL_JS))):
+            name = f"{'theme' if ext == 'css' else 'neural'}.{hashlib.sha256(text.encode()).hexdigest()[:12]}.{ext}"
+            files[name] = text
+        page = THEME_LOADER
+        for key, name in zip(("__CSS__", "__JS__"), files): page = page.replace(key, name)
+        files["index.html"] = page
+        version = hashlib.sha256(page.encode()).hexdigest()[:12]  # page names both asset hashes
+        path = os.path.join(THEME_DIR, version)
+        if not os.path.exists(os.path.join(path, "index.html")):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            os.makedirs(tmp, exist_ok=True)
+            for name, text in files.items():
+                with open(os.path.join(tmp, name), "w", encoding="utf-8") as f: f.write(text)
+            try: os.rename(tmp, path)
+            except OSError: shutil.rmtree(tmp, ignore_errors=True)  # another process published it first
+        os.utime(path)  # in use: restart its age
+        cutoff = time.time() - THEME_MAX_AGE
+        for old in set(os.listdir(THEME_DIR)) - {version}:
+            old = os.path.join(THEME_DIR, old)
+            try:
+                if os.path.getmtime(old) >= cutoff: continue
+                if os.path.isdir(old): shutil.rmtree(old)
+                else: os.remove(old)
+            except OSError: pass  # pruned by another process meanwhile
+        return components.declare_component("theme", path=path)
+    except OSError:
+        return None
+
+LOW_POWER = os.environ.get("DASHBOARD_LOW_POWER", "0") not in ("", "0")
+
+def low_power():
+    """Whether this session renders in low-power mode. Starts from ?lowpower=1
+    in the URL (for wallboards) or DASHBOARD_LOW_POWER; the header toggle
+    changes it for the session."""
+    if "low_power" not in st.session_state:
+        q = st.query_params.get("lowpower")
+        st.session_state.low_power = LOW_POWER if q is None else q not in ("0", "false")
+    return st.session_state.low_power
+
+theme = theme_component()
+if theme: theme(low_power=low_power(), key="theme", default=None)
+else: st.markdown(f"<style>{minify_css(THEME_CSS)}</style>", unsafe_allow_html=True)
+
+# ============================================================
+# PERFORMANCE STATS
+# ============================================================
+PERF_WINDOW = 200  # timings kept per stage for the p50/p95 columns
+
+class Perf:
+    """Rolling per-stage wall times and cache hit/miss counts for the whole
+    process. The poller thread records the Sheets round-trip and parsing,
+    script runs record calc() and each view."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.times = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name, run=None):
+        """Time the block as `name`; also store its ms in the `run` dict."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0, run)
+
+    def add(self, name, dt, run=None):
+        with self.lock:
+            self.times.setdefault(name, deque(maxlen=PERF_WINDOW)).append(dt)
+        if run is not None: run[name] = round(dt * 1000, 2)
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def table(self):
+        """One row per stage: runs kept, last, p50 and p95 in ms."""
+        with self.lock:
+            times = {k: np.array(v) * 1000 for k, v in self.times.items()}
+        return pd.DataFrame([{"Stage": k, "Runs": len(v), "Last ms": v[-1], "p50 ms": np.percentile(v, 50),
+                              "p95 ms": np.percentile(v, 95)} for k, v in times.items()])
+
+log = logging.getLogger("dashboard")
+if not log.handlers:
+    h = logging.StreamHandler()
+    h.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    log.addHandler(h)
+    log.setLevel(logging.INFO)
+    log.propagate = False
 
 # ============================================================
 # GOOGLE SHEETS
 # ============================================================
-@st.cache_resource(ttl=300)
-def get_service():
+# Local CSV stand-in for Sheets (see fake_sheets.py); no credentials or network needed.
+SHEETS_FILE = os.environ.get("DASHBOARD_SHEETS_FILE")
+
+def connect():
+    """A new Sheets service, or None if it cannot be built. Not cached: a
+    googleapiclient service holds one httplib2 connection and is not
+    thread-safe, so every concurrently fetched source gets its own."""
+    if SHEETS_FILE:
+        from fake_sheets import FakeService
+        return FakeService(SHEETS_FILE)
     try:
         if 'gcp_service_account' in st.secrets:
             info = dict(st.secrets["gcp_service_account"])
@@ -712,47 +958,482 @@ def get_service():
             info, scopes=['https://www.googleapis.com/auth/spreadsheets.readonly'])
         return build('sheets','v4',credentials=creds)
     except Exception as e:
-        st.error(f"Connection error: {e}")
+        log.error(f"Sheets connection error: {e}")
         return None
 
-@st.cache_data(ttl=30)
-def fetch_data():
+SHEET_TAB = "Form Responses 1"
+RECONCILE_EVERY = 600  # seconds between full re-reads that pick up edits to older rows
+SOURCE_WORKERS = 8  # most sources fetched at once
+
+def sheet_sources():
+    """The (spreadsheet, tab) sources merged into the dashboard, as
+    {"name", "sid", "tab"} dicts. Configured as a list of {"spreadsheet_id",
+    "tab", "name"} in DASHBOARD_SOURCES (JSON) or the `sources` secret; tab
+    defaults to SHEET_TAB and name to the tab. Without a list, the single
+    spreadsheet_id secret's SHEET_TAB. Raises ValueError on a malformed list
+    and FileNotFoundError when there are no secrets to read it from."""
+    raw = os.environ.get("DASHBOARD_SOURCES")
+    if raw: cfg = json.loads(raw)
+    elif SHEETS_FILE: cfg = [{}]
+    elif not st.secrets.load_if_toml_exists():
+        raise FileNotFoundError("no secrets.toml, DASHBOARD_SOURCES or DASHBOARD_SHEETS_FILE")
+    else:
+        cfg = [dict(x) for x in st.secrets.get("sources", [])] or \
+              [{"spreadsheet_id": st.secrets.get("spreadsheet_id","19SvmVDtkIUkuLaQzy6szSgUSixHZVBohbyOxf0itD8I")}]
+    if not isinstance(cfg, list) or not all(isinstance(x, dict) for x in cfg):
+        raise ValueError("sources must be a list of {spreadsheet_id, tab, name} objects")
+    out, names = [], set()
+    for i, x in enumerate(cfg, 1):
+        if not SHEETS_FILE and not x.get("spreadsheet_id"):
+            raise ValueError(f"source {i} has no spreadsheet_id")
+        tab = x.get("tab", SHEET_TAB)
+        name = base = x.get("name", tab)
+        i = 1
+        while name in names:
+            i += 1; name = f"{base} ({i})"
+        names.add(name)
+        out.append({"name": name, "sid": SHEETS_FILE or x["spreadsheet_id"], "tab": tab})
+    return out
+
+def ingest_state(src):
+    """Ingest watermark of one source: the header, how many data rows have
+    been ingested and the frame built from them. The Poller owns one per
+    source. Starts from the source's on-disk snapshot when there is one.
+    full_at is when the frame was last replaced by a full read, checked_at
+    when the tab was last re-read in full (changed or not)."""
+    s = {"src": src, "lock": threading.Lock(), "hdr": None, "rows": 0, "df": pd.DataFrame(), "full_at": 0.0,
+         "checked_at": 0.0, "ts": {"fmt": None, "bad": 0}, "saved_at": None}
+    s.update(load_snapshot(src))
+    s["cube"] = build_cube(s["df"])
+    s["trends"] = build_trends(s["df"])
+    return s
+
+def col_letter(n):
+    """1-based column number -> A1 column letters (1 -> A, 27 -> AA)."""
+    s = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+# Ingest schema: low-cardinality dimensions are categoricals, free text is
+# Arrow-backed strings, Timestamp is datetime64 and IsFailed a bool.
+DIM_COLS = ["Agent Name","Transfer to:","Status","Source"]
+TEXT_DTYPE = "string[pyarrow]"
+
+# The columns the dashboard reads; others in the tab are never requested.
+SHEET_COLS = ["Timestamp","Agent Name","Transfer to:","Customer Name:","Electric Bill:","Credit Score:","Status","FeedBack","H comments"]
+# Reads ask for typed values: numbers as numbers and date-times as serial day
+# counts since SERIAL_EPOCH, one list per column.
+READ_OPTS = {"majorDimension": "COLUMNS", "valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "SERIAL_NUMBER"}
+SERIAL_EPOCH = pd.Timestamp("1899-12-30")
+
+TS_FORMATS = ["%m/%d/%Y %H:%M:%S","%Y-%m-%d %H:%M:%S","%d/%m/%Y %H:%M:%S","%m/%d/%Y %H:%M"]
+
+def detect_ts_format(col, n=200):
+    """The TS_FORMATS entry that parses most of an evenly spaced sample of at
+    most `n` non-blank values (earlier formats win ties), or None."""
+    vals = col[col.notna() & (col.astype(str).str.strip() != "")]
+    vals = vals.iloc[::max(1, len(vals) // n)].head(n)
+    best, hits = None, 0
+    for fmt in TS_FORMATS:
+        ok = pd.to_datetime(vals, format=fmt, errors='coerce').notna().sum()
+        if ok > hits: best, hits = fmt, ok
+    return best
+
+def parse_ts(col, ts):
+    """Parse a Timestamp column in one pass with the remembered format.
+
+    `ts` is a {"fmt", "bad"} dict carried across refreshes: the format is
+    detected from a sample the first time (or again if it stops matching
+    most of a batch), values it cannot read are retried individually, and
+    whatever still fails is added to ts["bad"] instead of being dropped
+    silently."""
+    filled = col.notna() & (col.astype(str).str.strip() != "")
+    if ts["fmt"] is None:
+        ts["fmt"] = detect_ts_format(col)
+    out = pd.to_datetime(col, format=ts["fmt"], errors='coerce') if ts["fmt"] else pd.Series(pd.NaT, index=col.index)
+    miss = out.isna() & filled
+    if miss.sum() * 2 > filled.sum():
+        fmt = detect_ts_format(col[miss])
+        if fmt and fmt != ts["fmt"]:
+            ts["fmt"] = fmt
+            out = pd.to_datetime(col, format=fmt, errors='coerce')
+            miss = out.isna() & filled
+    if miss.any():
+        out[miss] = pd.to_datetime(col[miss], format="mixed", errors='coerce')
+        miss = out.isna() & filled
+    ts["bad"] += int(miss.sum())
+    return out
+
+def parse_serial(col, ts):
+    """Timestamp column from a SERIAL_NUMBER read: day counts convert in one
+    vectorized step. Cells that are still text (typed in by hand in a format
+    the sheet did not recognise, or every cell of a formatted read) go
+    through parse_ts()."""
+    if pd.api.types.infer_dtype(col, skipna=True) == "string":
+        return parse_ts(col, ts)
+    num = pd.to_numeric(col, errors='coerce')
+    out = SERIAL_EPOCH + pd.to_timedelta((num * 86400).round(), unit="s")
+    text = num.isna() & col.notna()
+    if text.any():
+        out[text] = parse_ts(col[text], ts)
+    return out
+
+def as_text(col):
+    """Numbers from an unformatted read as the text a formatted one showed."""
+    if pd.api.types.infer_dtype(col, skipna=True) in ("string", "empty"): return col
+    return col.map(lambda v: v if v is None or isinstance(v, str) else
+                   str(int(v)) if isinstance(v, float) and v.is_integer() else str(v))
+
+def parse_rows(hdr, rows, ts=None, source=None):
+    """parse_columns() for row-major, formatted values."""
+    rows = [r[:len(hdr)] + [None]*(len(hdr)-len(r)) for r in rows]
+    return typed_frame(pd.DataFrame(rows, columns=hdr), ts, source)
+
+def parse_columns(cols, ts=None, source=None):
+    """Typed frame from read_sheet() columns. The API drops each column's
+    trailing blanks, so shorter columns are padded to the longest."""
+    n = max(map(len, cols.values()), default=0)
+    return typed_frame(pd.DataFrame({c: pd.Series(v + [None]*(n-len(v)), dtype=object) for c, v in cols.items()}), ts, source)
+
+def typed_frame(df, ts=None, source=None):
+    """Apply the ingest schema to a frame of raw cell values."""
+    if "Timestamp" in df.columns:
+        df["Timestamp"] = parse_serial(df["Timestamp"], ts if ts is not None else {"fmt": None, "bad": 0})
+    if "Status" in df.columns:
+        df["Status"] = df["Status"].fillna("").astype(str).str.strip().str.lower()
+    if "Status" in df.columns:
+        df["IsFailed"] = df["Status"].isin(["failed", "reject", "rejected", "fail", "not done"])
+    else:
+        df["IsFailed"] = False
+        
+    for c in SHEET_COLS:
+        if c not in df.columns: df[c] = pd.NaT if c == "Timestamp" else None
+    df["Source"] = source
+    for c in df.columns:
+        if c in DIM_COLS: df[c] = as_text(df[c]).astype("category")
+        elif c not in ("Timestamp","IsFailed"): df[c] = as_text(df[c]).astype(TEXT_DTYPE)
+    return df
+
+def append_rows(a, b):
+    """Concatenate two parsed batches. Categories are unioned first so the
+    dimension columns stay categorical instead of decaying to object."""
+    if a.empty: return b
+    a, b = a.copy(deep=False), b.copy(deep=False)
+    for c in DIM_COLS:
+        cats = a[c].cat.categories.union(b[c].cat.categories, sort=False)
+        a[c] = a[c].cat.set_categories(cats)
+        b[c] = b[c].cat.set_categories(cats)
+    return pd.concat([a, b], ignore_index=True)
+
+def col_blocks(hdr):
+    """Runs of adjacent SHEET_COLS in `hdr` as [first, last] column numbers."""
+    blocks = []
+    for i, c in enumerate(hdr, 1):
+        if c not in SHEET_COLS: continue
+        if blocks and blocks[-1][1] == i - 1: blocks[-1][1] = i
+        else: blocks.append([i, i])
+    return blocks
+
+def read_sheet(api, sid, tab, hdr, start):
+    """One batchGet of the header row and, given the known `hdr`, the used
+    columns from row `start` down: (header, {column: values}). Values are
+    typed and column-major (READ_OPTS), so each becomes a Series as is."""
+    blocks = col_blocks(hdr) if hdr else []
+    ranges = [f"'{tab}'!1:1"] + [f"'{tab}'!{col_letter(a)}{start}:{col_letter(b)}" for a, b in blocks]
+    res = api.batchGet(spreadsheetId=sid, ranges=ranges, **READ_OPTS).execute().get('valueRanges',[])
+    cur = [str(c[0]) if c else "" for c in (res[0].get('values',[]) if res else [])]
+    cols = {}
+    for (a, b), r in zip(blocks, res[1:]):
+        vals = r.get('values',[])
+        for i in range(a, b + 1):
+            cols[hdr[i-1]] = vals[i-a] if i - a < len(vals) else []
+    return cur, cols
+
+def ingest(svc, s, perf=None):
+    """Bring one source's frame up to date with its sheet.
+
+    Form responses are append-only, so normally only the rows below the
+    watermark are requested (together with the header row, to notice column
+    changes) and appended. Every RECONCILE_EVERY seconds, or when the header
+    changes, the whole tab is re-read so edits/deletions of older rows show up;
+    when that re-read matches the current frame, the frame is kept as is so the
+    snapshot version (and everything cached on it) survives the reconcile."""
+    perf = perf or Perf()
+    api = svc.spreadsheets().values()
+    sid, tab, name = s["src"]["sid"], s["src"]["tab"], s["src"]["name"]
+    with s["lock"]:
+        hdr = s["hdr"]
+        if hdr is not None and time.time() - s["checked_at"] < RECONCILE_EVERY:
+            with perf.stage("sheets: incremental read"):
+                cur, cols = read_sheet(api, sid, tab, hdr, s["rows"] + 2)
+            if cur == hdr:
+                if any(cols.values()):
+                    with perf.stage("parse: new rows"):
+                        batch = parse_columns(cols, s["ts"], name)
+                        s["df"] = append_rows(s["df"], batch)
+                    with perf.stage("cube: merge"):
+                        s["cube"] = merge_cubes(s["cube"], build_cube(batch))
+                        s["trends"] = merge_trends(s["trends"], build_trends(batch))
+                    s["rows"] += len(batch)
+                return s["df"]
+        with perf.stage("sheets: full read"):
+            cur, cols = read_sheet(api, sid, tab, hdr, 2)
+            if cur and cur != hdr:  # first read or moved columns: ask again for the new positions
+                cur, cols = read_sheet(api, sid, tab, cur, 2)
+        if not cur:
+            if hdr is not None:
+                s.update(hdr=None, rows=0, df=pd.DataFrame(), cube=build_cube(pd.DataFrame()),
+                         trends=build_trends(pd.DataFrame()), full_at=0.0)
+            return s["df"]
+        s["ts"]["bad"] = 0
+        with perf.stage("parse: full"):
+            df = parse_columns(cols, s["ts"], name)
+        s["checked_at"] = time.time()
+        if cur == hdr and len(df) == s["rows"] and df.equals(s["df"]):
+            return s["df"]
+        with perf.stage("cube: build"):
+            cube, trends = build_cube(df), build_trends(df)
+        s.update(hdr=cur, rows=len(df), df=df, cube=cube, trends=trends, full_at=time.time())
+        return s["df"]
+
+def sources_state(sources, error=None):
+    """Ingest states of all `sources` plus the merged snapshot fields built
+    from them (df, cube, trends, rows, full_at, bad timestamps, error).
+    `error` explains an empty `sources` (an unreadable source config)."""
+    m = {"sources": [ingest_state(src) for src in sources], "seen": None, "df": pd.DataFrame(), "cube": None,
+         "trends": None, "rows": 0, "full_at": 0.0, "bad": 0, "error": error}
+    saved = [x["saved_at"] for x in m["sources"] if x["saved_at"]]
+    m["saved_at"] = min(saved) if saved else None
+    merge_sources(m)
+    return m
+
+def merge_sources(m):
+    """Fold the sources' frames, cubes and trends into m and return the merged
+    frame. Between full re-reads it stays append-only like a single sheet:
+    rows the sources appended since the last merge go on the end, and with
+    nothing new the same frame comes back. A full re-read of any source
+    rebuilds it from all sources in order."""
+    srcs = m["sources"]
+    m["bad"] = sum(x["ts"]["bad"] for x in srcs)
+    if not srcs:
+        m.update(df=pd.DataFrame(), cube=build_cube(pd.DataFrame()), trends=build_trends(pd.DataFrame()))
+        return m["df"]
+    if len(srcs) == 1:
+        x = srcs[0]
+        m.update(df=x["df"], cube=x["cube"], trends=x["trends"], rows=x["rows"], full_at=x["full_at"])
+        return m["df"]
+    seen, now = m["seen"], [(x["full_at"], x["rows"]) for x in srcs]
+    m.update(seen=now, rows=sum(x["rows"] for x in srcs))
+    if seen is not None and all(a[0] == b[0] for a, b in zip(seen, now)):
+        new = [x["df"].iloc[n:] for x, (_, n) in zip(srcs, seen) if x["rows"] > n]
+        if new:
+            batch = reduce(append_rows, new)
+            m.update(df=append_rows(m["df"], batch), cube=merge_cubes(m["cube"], build_cube(batch)),
+                     trends=merge_trends(m["trends"], build_trends(batch)))
+        return m["df"]
+    dfs = [x["df"] for x in srcs if not x["df"].empty]
+    m.update(df=reduce(append_rows, dfs) if dfs else pd.DataFrame(), cube=reduce(merge_cubes, [x["cube"] for x in srcs]),
+             trends=reduce(merge_trends, [x["trends"] for x in srcs]), full_at=max(x["full_at"] for x in srcs))
+    return m["df"]
+
+# ============================================================
+# SNAPSHOT CACHE
+# ============================================================
+PERSIST_EVERY = 120  # minimum seconds between snapshot writes
+
+def snapshot_file(src):
+    """One Parquet file per source, named after its spreadsheet and tab."""
+    key = hashlib.sha1(f"{src['sid']}\0{src['tab']}".encode()).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"snapshot-{key}.parquet")
+
+def save_snapshot(s):
+    """Write the ingested frame and its watermark (header, row count, timestamp
+    format) to one Parquet file, replaced atomically so a crash mid-write
+    never leaves a frame and watermark that disagree."""
+    with s["lock"]:
+        hdr, rows, df, ts = s["hdr"], s["rows"], s["df"], dict(s["ts"])
+    if hdr is None: return
+    meta = {"hdr": hdr, "rows": rows, "ts": ts, "saved_at": time.time()}
+    t = pa.Table.from_pandas(df, preserve_index=False)
+    t = t.replace_schema_metadata({**(t.schema.metadata or {}), b"dashboard": json.dumps(meta).encode()})
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = snapshot_file(s["src"])
+    tmp = f"{path}.{os.getpid()}.tmp"  # replicas sharing CACHE_DIR must not write the same temp file
+    pq.write_table(t, tmp)
+    os.replace(tmp, path)
+
+def load_snapshot(src):
+    """Ingest-state fields restored from the last saved snapshot, or {}. The
+    restored rows count as freshly reconciled, so the next refreshes are
+    incremental fetches from the saved watermark."""
+    path = snapshot_file(src)
+    if not os.path.exists(path): return {}
     try:
-        svc = get_service()
-        if not svc: return pd.DataFrame()
-        sid = st.secrets.get("spreadsheet_id","19SvmVDtkIUkuLaQzy6szSgUSixHZVBohbyOxf0itD8I")
-        vals = svc.spreadsheets().values().get(spreadsheetId=sid, range="Form Responses 1").execute().get('values',[])
-        if not vals: return pd.DataFrame()
-        hdr = vals[0]
-        rows = [r[:len(hdr)] + [None]*(len(hdr)-len(r)) for r in vals[1:]]
-        df = pd.DataFrame(rows, columns=hdr)
-        if "Timestamp" in df.columns:
-            for fmt in ["%m/%d/%Y %H:%M:%S","%Y-%m-%d %H:%M:%S","%d/%m/%Y %H:%M:%S","%m/%d/%Y %H:%M"]:
-                try: df["Timestamp"] = pd.to_datetime(df["Timestamp"],format=fmt); break
-                except: pass
-            else: df["Timestamp"] = pd.to_datetime(df["Timestamp"],errors='coerce')
-        if "Status" in df.columns:
-            df["Status"] = df["Status"].astype(str).str.strip().str.lower()
-        if "Status" in df.columns:
-            df["IsFailed"] = df["Status"].isin(["failed", "reject", "rejected", "fail", "not done"])
-        else:
-            df["IsFailed"] = False
-            
-        for c in ["Timestamp","Agent Name","Transfer to:","Customer Name:","Electric Bill:","Credit Score:","Status","FeedBack","H comments"]:
-            if c not in df.columns: df[c] = None
-        return df
+        t = pq.read_table(path)
+        meta = json.loads(t.schema.metadata[b"dashboard"])
+        text = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+        df = t.to_pandas(types_mapper=text.get)
+        df["Source"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), [src["name"]])  # name may have been renamed
+        return {"hdr": meta["hdr"], "rows": meta["rows"], "ts": meta["ts"], "saved_at": meta["saved_at"],
+                "df": df, "full_at": time.time(), "checked_at": time.time()}
     except Exception as e:
-        st.error(f"Error: {e}")
-        return pd.DataFrame()
+        log.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return {}
+
+def fetch_data(svc, m, perf=None):
+    """Bring every source of `m` up to date and return the merged frame.
+
+    Sources are fetched concurrently on a thread pool, so a refresh takes
+    about as long as the slowest one. Without a shared `svc` each source
+    connects its own. A failing source keeps its last good rows and is named
+    in m["error"]; only when all of them fail is the error raised."""
+    perf = perf or Perf()
+    def one(s):
+        if svc is None and s.get("svc") is None: s["svc"] = connect()
+        conn = svc or s["svc"]
+        if not conn: raise RuntimeError("could not connect to Google Sheets")
+        ingest(conn, s, perf)
+    srcs, errs = m["sources"], {}
+    if not srcs: raise RuntimeError(m["error"] or "no Sheets sources configured")
+    with ThreadPoolExecutor(min(len(srcs), SOURCE_WORKERS), thread_name_prefix="sheets-source") as ex:
+        jobs = [(s["src"]["name"], ex.submit(one, s)) for s in srcs]
+        for name, job in jobs:
+            try: job.result()
+            except Exception as e: errs[name] = e
+    if len(errs) == len(srcs): raise next(iter(errs.values()))
+    m["error"] = "; ".join(f"{n}: {e}" for n, e in errs.items()) or None
+    with perf.stage("sources: merge"):
+        return merge_sources(m)
+
+# ============================================================
+# BACKGROUND POLLER
+# ============================================================
+REFRESH_EVERY = 30  # seconds between background Sheets refreshes
+
+class Poller:
+    """Owns the Sheets fetch for the whole server process.
+
+    A daemon thread refreshes the data every REFRESH_EVERY seconds and
+    publishes it as an immutable snapshot dict; sessions only ever read the
+    latest completed snapshot (stale-while-revalidate) and never block on
+    the network. A failed refresh keeps serving the last good data.
+
+    st.cache_resource never hits outside a script run, so everything the
+    thread needs (ingest state, Sheets service) is held on the instance
+    rather than looked up through cached functions from the thread."""
+
+    def __init__(self, every=REFRESH_EVERY, svc=None):
+        self.every = every
+        self.snap = {"df": pd.DataFrame(), "cube": None, "trends": None, "version": 0, "at": None, "error": None, "ts_bad": 0,
+                     "full_at": 0.0}
+        self.refreshing = False
+        self.ready = threading.Event()
+        self.wake = threading.Event()
+        self.saved_at = 0.0
+        self.perf = Perf()
+        self.calcs, self.calc_lock = {}, threading.Lock()
+        self.svc = svc  # shared by all sources; None: each source connects its own
+        try:
+            sources, err = sheet_sources(), None
+        except Exception as e:  # no secrets, bad DASHBOARD_SOURCES: start without sources and say why
+            sources, err = [], f"Sheets source config error: {e}"
+            log.error(err)
+        self.state = s = sources_state(sources, err)
+        self.snap["error"] = err
+        if not s["df"].empty:
+            # warm start: serve the on-disk snapshot until the first refresh lands
+            self.snap = dict(self.snap, df=s["df"], cube=s["cube"], trends=s["trends"], version=1, at=s["saved_at"], ts_bad=s["bad"],
+                             full_at=s["full_at"])
+            self.saved_at = s["saved_at"]
+            self.ready.set()
+        threading.Thread(target=self.run, name="sheets-poller", daemon=True).start()
+
+    def run(self):
+        while True:
+            self.refresh()
+            self.wake.wait(self.every)
+            self.wake.clear()
+
+    def refresh(self):
+        self.refreshing = True
+        cur = self.snap
+        try:
+            with self.perf.stage("refresh: total"):
+                df = fetch_data(self.svc, self.state, self.perf)
+            version = cur["version"] + 1 if df is not cur["df"] else cur["version"]
+            self.snap = {"df": df, "cube": self.state["cube"], "trends": self.state["trends"], "version": version, "at": time.time(),
+                         "error": self.state["error"], "ts_bad": self.state["bad"], "full_at": self.state["full_at"]}
+        except Exception as e:
+            self.snap = dict(cur, error=str(e))
+        finally:
+            self.refreshing = False
+            self.ready.set()
+        if self.snap["version"] != cur["version"] and time.time() - self.saved_at >= PERSIST_EVERY:
+            self.persist()
+
+    def persist(self):
+        self.saved_at = time.time()
+        try:
+            for s in self.state["sources"]: save_snapshot(s)
+        except Exception: pass  # best effort; retried on the next change after PERSIST_EVERY
+
+    def snapshot(self, wait=0):
+        """Latest completed snapshot. `wait` bounds how long a cold start may
+        block for the very first fetch; afterwards this never waits."""
+        if wait and not self.ready.is_set():
+            self.ready.wait(wait)
+        return self.snap
+
+    def calc(self, snap, admin, now, probe=None):
+        """calc() of `snap` for one mode and period epoch, computed once per
+        (version, mode, epoch) and shared by every session and the API (no
+        st.cache_resource: the API calls this outside script runs). The
+        result is shared, so callers must treat it as read-only. `probe` is
+        marked on a miss."""
+        key = (snap["version"], admin, period_epoch(now))
+        hit = self.calcs.get(key)
+        if hit is not None: return hit
+        with self.calc_lock:
+            hit = self.calcs.get(key)
+            if hit is None:
+                if probe is not None: probe["miss"] = True
+                hit = calc(snap["df"], admin, snap["cube"], now, snap["trends"])
+                if hit: hit.update(version=snap["version"], mode="admin" if admin else "user")
+                calcs = {k: v for k, v in self.calcs.items() if k[0] >= snap["version"] - 1}
+                calcs[key] = hit
+                self.calcs = calcs
+        return hit
+
+    def age(self):
+        at = self.snap["at"]
+        return None if at is None else time.time() - at
+
+@st.cache_resource
+def get_poller():
+    return Poller()
+
+def snapshot_status(poller):
+    age = poller.age()
+    txt = "waiting for first load" if age is None else f"data {age:.0f}s old"
+    if poller.refreshing: txt += " · refreshing…"
+    if poller.snap["ts_bad"]: txt += f" · {poller.snap['ts_bad']} unreadable timestamps"
+    if poller.snap["error"]: txt += " · last refresh failed"
+    return txt
 
 # ============================================================
 # HELPER FUNCTIONS
 # ============================================================
-def get_custom_date_range():
+def clock():
+    """Wall-clock 'now' behind every period window."""
+    return datetime.now()
+
+def get_custom_date_range(today=None):
     """Get date range from the 11th of current/previous month at 02:00 to the 10th
     of next month (extending 2 hours past midnight into the 11th), i.e. the period
     runs [11th 02:00 -> next 11th 02:00)."""
-    today = datetime.now()
+    today = today or clock()
     cutoff = today.replace(hour=2, minute=0, second=0, microsecond=0)
     if today.day > 11 or (today.day == 11 and today >= cutoff):
         start_date = datetime(today.year, today.month, 11, 2, 0, 0)
@@ -768,9 +1449,9 @@ def get_custom_date_range():
         end_date = datetime(today.year, today.month, 11, 2, 0, 0)
     return start_date, end_date
 
-def get_previous_period_range():
+def get_previous_period_range(today=None):
     """Returns the (start, end) of the period immediately before the current custom period."""
-    cur_start, _ = get_custom_date_range()
+    cur_start, _ = get_custom_date_range(today)
     if cur_start.month == 1:
         prev_start = datetime(cur_start.year - 1, 12, cur_start.day, cur_start.hour, cur_start.minute, cur_start.second)
     else:
@@ -778,8 +1459,13 @@ def get_previous_period_range():
     prev_end = cur_start
     return prev_start, prev_end
 
-def ranges():
-    n = datetime.now()
+def period_epoch(n):
+    """Key that changes exactly when ranges(n) does: the day, week and month
+    windows roll over at midnight, the custom period at 02:00 on the 11th."""
+    return (n.date(), get_custom_date_range(n)[0])
+
+def ranges(n=None):
+    n = n or clock()
     ts = datetime(n.year,n.month,n.day)
     y = n - timedelta(days=1)
     ys = datetime(y.year,y.month,y.day)
@@ -790,8 +1476,8 @@ def ranges():
     lms = datetime(n.year-1,12,1) if n.month==1 else datetime(n.year,n.month-1,1)
     lme = ms
     
-    custom_start, custom_end = get_custom_date_range()
-    prev_start, prev_end = get_previous_period_range()
+    custom_start, custom_end = get_custom_date_range(n)
+    prev_start, prev_end = get_previous_period_range(n)
     
     return {
         "today":(ts, ts+timedelta(days=1)),
@@ -804,18 +1490,158 @@ def ranges():
         "prev_custom":(prev_start, prev_end)
     }
 
-def calc(df, use_custom_range=False):
+def window(d, s, e):
+    """Rows of `d` with s <= Timestamp < e. `d` must be sorted by Timestamp, so
+    the window is two binary searches and a contiguous slice, not a scan."""
+    ts = d["Timestamp"]
+    return d.iloc[ts.searchsorted(s, side="left"):ts.searchsorted(e, side="left")]
+
+def agent_index(d):
+    """Agent name -> positions of that agent's rows in `d`. Positions keep
+    d's order, so on a Timestamp-sorted frame each list is time-sorted too."""
+    if d.empty or "Agent Name" not in d.columns: return {}
+    return {str(a): p for a, p in d.groupby("Agent Name", observed=True, sort=False).indices.items()}
+
+def span(d, pos, start, end):
+    """The entries of `pos` (positions into Timestamp-sorted `d`, a range or an
+    array) dated start..end inclusive, found by binary search."""
+    ts = d["Timestamp"].to_numpy()
+    bounds = [np.datetime64(start), np.datetime64(end + timedelta(days=1))]
+    if isinstance(pos, range):
+        return range(*np.searchsorted(ts[pos.start:pos.stop], bounds) + pos.start)
+    a, b = np.searchsorted(ts[pos], bounds)
+    return pos[a:b]
+
+def sort_positions(d, pos, col, desc=False):
+    """`pos` ordered by `col` of Timestamp-sorted `d`. Time order is free;
+    categoricals sort by category name, blanks last."""
+    if col == "Timestamp": return pos[::-1] if desc else pos
+    v = d[col]
+    pos = np.asarray(pos)
+    cats = v.cat.categories.astype(str)
+    rank = np.empty(len(cats) + 1, dtype=np.int64)
+    rank[np.argsort(cats, kind="stable")] = np.arange(len(cats))
+    rank[-1] = len(cats)  # code -1 (missing)
+    keys = rank[v.cat.codes.to_numpy()[pos]]
+    return pos[np.argsort(-keys if desc else keys, kind="stable")]
+
+def rank_rows(counts, n=10, low=None, bars=True):
+    """The top `n` of `counts` as one HTML string of rank-rows, each keyed by
+    rank and agent so the frontend patches only rows whose content changed."""
+    mx = counts.max() if len(counts) else 0
+    rows = []
+    for i, (ag, cnt) in enumerate(counts.head(n).items(), 1):
+        name = html.escape(str(ag))
+        if bars:
+            m = {1:"🥇",2:"🥈",3:"🥉"}.get(i,f'<span style="color:white !important;font-weight:700;">{i}.</span>')
+            bw = (cnt/mx*100) if mx>0 else 0
+            rows.append(f"""<div class="rank-row {"rank-low" if ag==low else ""}" data-rank="{i}" data-key="{name}" style="animation-delay:{i*0.06}s;">
+<div style="flex:1;"><div style="display:flex;align-items:center;gap:8px;"><span style="font-size:16px;">{m}</span>
+<span style="font-weight:700;color:white !important;font-size:14px;">{name}</span></div>
+<div class="bar-track"><div class="bar-fill" style="width:{bw}%;animation-delay:{i*0.06}s;"></div></div></div>
+<span style="color:white !important;font-weight:800;font-size:18px;margin-left:12px;">{int(cnt)}</span></div>""")
+        else:
+            m = {1:"🥇",2:"🥈",3:"🥉"}.get(i, f"{i}.")
+            rows.append(f"""<div class="rank-row" data-rank="{i}" data-key="{name}" style="animation-delay:{i*0.05}s;">
+<div style="display:flex;align-items:center;gap:12px;"><span style="font-size:20px;">{m}</span>
+<span style="font-weight:700;font-size:16px;">{name}</span></div>
+<span style="font-weight:800;font-size:20px;">{int(cnt)}</span></div>""")
+    return "\n".join(rows)
+
+# The rollup cube: completed/failed/pending counts per (hour, agent,
+# destination). Every calc() window starts on an hour boundary, so period,
+# leaderboard and destination figures are exact sums over cube slices.
+CUBE_KEYS = ["Timestamp","Agent Name","Transfer to:","Kind"]
+KINDS = ["done","failed","pend"]
+
+def build_cube(df):
+    """Roll transfer rows up into the cube: one row per (hour, agent,
+    destination, kind) with its count `n`, sorted by hour."""
+    if "Timestamp" not in df.columns:
+        return pd.DataFrame({"Timestamp": pd.Series(dtype="datetime64[ns]"), "Agent Name": pd.Series(dtype=object),
+                             "Transfer to:": pd.Series(dtype=object), "Kind": pd.Categorical([], categories=KINDS),
+                             "n": pd.Series(dtype="int64")})
+    d = df[df["Timestamp"].notna()]
+    kind = np.select([d["Status"] == "done", d["IsFailed"] == True], ["done", "failed"], "pend")
+    g = pd.DataFrame({"Timestamp": d["Timestamp"].dt.floor("h"), "Agent Name": d["Agent Name"],
+                      "Transfer to:": d["Transfer to:"], "Kind": pd.Categorical(kind, categories=KINDS)})
+    cube = g.groupby(CUBE_KEYS, observed=True, dropna=False).size().reset_index(name="n")
+    for c in ("Agent Name","Transfer to:"):
+        cube[c] = cube[c].astype(object)
+    return cube
+
+def merge_cubes(a, b):
+    """Fold the cube of an appended batch into `a`. Only buckets from b's
+    first hour onwards are re-aggregated (for an append-only sheet, the
+    current hour); older buckets are carried over as they are."""
+    if a.empty: return b
+    if b.empty: return a
+    i = a["Timestamp"].searchsorted(b["Timestamp"].iloc[0], side="left")
+    tail = pd.concat([a.iloc[i:], b], ignore_index=True)
+    tail = tail.groupby(CUBE_KEYS, observed=True, dropna=False)["n"].sum().reset_index()
+    return pd.concat([a.iloc[:i], tail], ignore_index=True)
+
+# Completed-transfer trend series: counts per day, ISO week (keyed by its
+# Monday) and month (keyed by its 1st), indexed by bucket start in time order.
+# Kept next to the cube and folded forward the same way.
+def build_trends(df):
+    if df.empty or "Timestamp" not in df.columns or "Status" not in df.columns:
+        ts = pd.Series(dtype="datetime64[ns]")
+    else:
+        ts = df.loc[(df["Status"] == "done") & df["Timestamp"].notna(), "Timestamp"]
+    daily = ts.dt.normalize().value_counts().sort_index().astype("int64")
+    days = daily.index
+    return {"D": daily,
+            "W": daily.groupby(days - pd.to_timedelta(days.weekday, unit="D")).sum(),
+            "M": daily.groupby(days.to_period("M").to_timestamp()).sum()}
+
+def merge_trends(a, b):
+    """Add an appended batch's trends into `a`, re-aggregating only buckets
+    from b's first one onwards (normally just the current day/week/month)."""
+    out = {}
+    for f, s in a.items():
+        t = b[f]
+        if s.empty or t.empty:
+            out[f] = t if s.empty else s
+            continue
+        i = s.index.searchsorted(t.index[0])
+        out[f] = pd.concat([s.iloc[:i], s.iloc[i:].add(t, fill_value=0).astype("int64")])
+    return out
+
+def tally(c, col):
+    """Summed cube counts per `col`, largest first, without missing keys --
+    the cube counterpart of value_counts() over the underlying rows."""
+    t = c.groupby(col)["n"].sum()
+    t = t[t > 0].sort_values(ascending=False, kind="stable")
+    t.name = "count"
+    return t
+
+def agent_stats(cube):
+    """Per-agent total/done/failed/pending counts and success/fail rates from
+    the cube: {agent: {"total", "done", "failed", "pending", "success_rate", "fail_rate"}}."""
+    g = cube.groupby(["Agent Name","Kind"], observed=True)["n"].sum().unstack("Kind", fill_value=0)
+    g = g.reindex(columns=KINDS, fill_value=0)
+    g = pd.DataFrame({"total": g.sum(axis=1), "done": g["done"], "failed": g["failed"], "pending": g["pend"]})
+    g["success_rate"] = g["done"] / g["total"] * 100
+    g["fail_rate"] = g["failed"] / g["total"] * 100
+    return g.to_dict("index")
+
+def calc(df, use_custom_range=False, cube=None, now=None, trends=None):
     if df.empty: return {}
-    df = df[df["Timestamp"].notna()].copy()
+    df = df[df["Timestamp"].notna()]
     if df.empty: return {}
-    done = df[df["Status"]=="done"].copy()
-    failed = df[df["IsFailed"] == True].copy()
-    total = len(df)
-    dn = len(done)
-    pend = total - dn - len(failed)
-    failed_count = len(failed)
+    if cube is None: cube = build_cube(df)
+    if trends is None: trends = build_trends(df)
+    done = df[df["Status"]=="done"].sort_values("Timestamp", kind="stable")
+    failed = df[df["IsFailed"] == True].sort_values("Timestamp", kind="stable")
+    dc = cube[cube["Kind"] == "done"]
+    fc = cube[cube["Kind"] == "failed"]
+    total = int(cube["n"].sum())
+    dn = int(dc["n"].sum())
+    failed_count = int(fc["n"].sum())
+    pend = total - dn - failed_count
     
-    r = ranges()
+    r = ranges(now)
     
     def f(d,k):
         if k == "custom" and use_custom_range:
@@ -824,42 +1650,22 @@ def calc(df, use_custom_range=False):
             s,e = r["prev_custom"]
         else:
             s,e = r[k]
-        return d[(d["Timestamp"]>=s)&(d["Timestamp"]<e)]
+        return window(d, s, e)
     
-    td=f(done,"today")
-    yd=f(done,"yest")
-    tw=f(done,"week")
-    lw=f(done,"lweek")
-    tm=f(done,"month")
-    lm=f(done,"lmonth")
-    tc_custom = f(done, "custom") if use_custom_range else pd.DataFrame()
-    tc_prev = f(done, "prev_custom") if use_custom_range else pd.DataFrame()
+    def n(d,k): return int(f(d,k)["n"].sum())
     
-    failed_by_agent = failed["Agent Name"].value_counts() if "Agent Name" in failed.columns else pd.Series()
-    failed_today = f(failed, "today")
-    failed_week = f(failed, "week")
-    failed_month = f(failed, "month")
-    failed_custom = f(failed, "custom") if use_custom_range else pd.DataFrame()
+    ctd, cyd = n(dc,"today"), n(dc,"yest")
+    ctw, clw = n(dc,"week"), n(dc,"lweek")
+    ctm, clm = n(dc,"month"), n(dc,"lmonth")
+    cc = f(dc, "custom") if use_custom_range else dc.iloc[:0]
+    cp = f(dc, "prev_custom") if use_custom_range else dc.iloc[:0]
     
     def pc(a,b): return ((a-b)/b*100) if b>0 else 0
     
-    tc = done["Transfer to:"].value_counts() if "Transfer to:" in done.columns else pd.Series()
-    ac = done["Agent Name"].value_counts() if "Agent Name" in done.columns else pd.Series()
+    tc = tally(dc, "Transfer to:")
+    ac = tally(dc, "Agent Name")
     
-    agent_success_rates = {}
-    if "Agent Name" in df.columns:
-        for agent in df["Agent Name"].dropna().unique():
-            agent_total = len(df[df["Agent Name"] == agent])
-            agent_done = len(done[done["Agent Name"] == agent])
-            agent_failed = len(failed[failed["Agent Name"] == agent])
-            agent_success_rates[agent] = {
-                "total": agent_total,
-                "done": agent_done,
-                "failed": agent_failed,
-                "pending": agent_total - agent_done - agent_failed,
-                "success_rate": (agent_done / agent_total * 100) if agent_total > 0 else 0,
-                "fail_rate": (agent_failed / agent_total * 100) if agent_total > 0 else 0
-            }
+    agent_success_rates = agent_stats(cube) if "Agent Name" in df.columns else {}
     
     return {
         "total":total,"done":dn,"pend":pend,"failed":failed_count,
@@ -867,27 +1673,306 @@ def calc(df, use_custom_range=False):
         "dest":tc.index[0] if not tc.empty else "N/A",
         "dest_n":int(tc.iloc[0]) if not tc.empty else 0,
         "tc":tc,"ac":ac,
-        "ac_t":td["Agent Name"].value_counts() if "Agent Name" in td.columns else pd.Series(),
-        "ac_w":tw["Agent Name"].value_counts() if "Agent Name" in tw.columns else pd.Series(),
-        "ac_m":tm["Agent Name"].value_counts() if "Agent Name" in tm.columns else pd.Series(),
-        "ac_custom":tc_custom["Agent Name"].value_counts() if "Agent Name" in tc_custom.columns else pd.Series(),
-        "ac_prev":tc_prev["Agent Name"].value_counts() if "Agent Name" in tc_prev.columns else pd.Series(),
-        "tc_prev":len(tc_prev),
+        "ac_t":tally(f(dc,"today"), "Agent Name"),
+        "ac_w":tally(f(dc,"week"), "Agent Name"),
+        "ac_m":tally(f(dc,"month"), "Agent Name"),
+        "ac_custom":tally(cc, "Agent Name"),
+        "ac_prev":tally(cp, "Agent Name"),
+        "tc_prev":int(cp["n"].sum()),
         "low":ac.idxmin() if len(ac)>1 else "N/A",
-        "td":len(td),"yd":len(yd),"dp":pc(len(td),len(yd)),
-        "tw":len(tw),"lw":len(lw),"wp":pc(len(tw),len(lw)),
-        "tm":len(tm),"lm":len(lm),"mp":pc(len(tm),len(lm)),
-        "tc_custom":len(tc_custom),
-        "full":df,"done_df":done,"failed_df":failed,
-        "tdf":td,"wdf":tw,"mdf":tm,"custom_df":tc_custom,
-        "failed_by_agent":failed_by_agent,
-        "failed_today":len(failed_today),
-        "failed_week":len(failed_week),
-        "failed_month":len(failed_month),
-        "failed_custom":len(failed_custom),
-        "agent_success_rates":agent_success_rates
+        "td":ctd,"yd":cyd,"dp":pc(ctd,cyd),
+        "tw":ctw,"lw":clw,"wp":pc(ctw,clw),
+        "tm":ctm,"lm":clm,"mp":pc(ctm,clm),
+        "tc_custom":int(cc["n"].sum()),
+        "full":df,"done_df":done,"failed_df":failed,"failed_idx":agent_index(failed),"done_idx":agent_index(done),
+        "failed_by_agent":tally(fc, "Agent Name"),
+        "failed_today":n(fc, "today"),
+        "failed_week":n(fc, "week"),
+        "failed_month":n(fc, "month"),
+        "failed_custom":n(fc, "custom") if use_custom_range else 0,
+        "agent_success_rates":agent_success_rates,
+        "trends":trends
     }
 
+# Chart payload limits. A figure builder gets a `cap`: the most points per
+# line series or bars per bar chart it may send. Lines are LTTB-downsampled
+# to the cap and switch to WebGL past CHART_WEBGL points; bar charts keep
+# the top entries plus one "Others" slice or bar, starting from CHART_TOP_N.
+# If the figure JSON still exceeds CHART_MAX_KB, the cap is halved and the
+# figure rebuilt until it fits or stops shrinking (0 = no limit).
+CHART_MAX_POINTS = int(os.environ.get("DASHBOARD_CHART_MAX_POINTS", "1500"))
+CHART_TOP_N = int(os.environ.get("DASHBOARD_CHART_TOP_N", "30"))
+CHART_MAX_KB = int(os.environ.get("DASHBOARD_CHART_MAX_KB", "512"))
+CHART_WEBGL = 500
+
+def lttb(x, y, n):
+    """Positions of `n` points of the series (x, y) chosen by Largest-Triangle-
+    Three-Buckets, which keeps peaks and troughs; all positions if n covers it."""
+    m = len(y)
+    if n >= m or n < 3: return np.arange(m)
+    x = np.asarray(x, dtype="int64" if np.issubdtype(np.asarray(x).dtype, np.datetime64) else float).astype(float)
+    y = np.asarray(y, dtype=float)
+    e = np.append(np.linspace(1, m - 1, n - 1).astype(np.int64), m)
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1], p = 0, m - 1, 0
+    for i in range(n - 2):
+        lo, hi, nhi = e[i], e[i + 1], e[i + 2]
+        ax, ay = x[hi:nhi].mean(), y[hi:nhi].mean()
+        area = np.abs((x[p] - ax) * (y[lo:hi] - y[p]) - (x[p] - x[lo:hi]) * (ay - y[p]))
+        p = lo + int(area.argmax())
+        out[i + 1] = p
+    return out
+
+def top_n(s, n, other="Others"):
+    """Count Series `s` cut to its `n` largest entries plus one summed `other` entry."""
+    if len(s) <= n: return s
+    s = s.sort_values(ascending=False, kind="stable")
+    return pd.concat([s.iloc[:n], pd.Series({other: s.iloc[n:].sum()})])
+
+def fit(build, cap=CHART_MAX_POINTS):
+    """build(cap) with the largest cap, at most `cap`, whose JSON fits in
+    CHART_MAX_KB. Stops early once halving the cap no longer changes the figure."""
+    fig = build(cap)
+    js = fig.to_json() if CHART_MAX_KB else ""
+    while CHART_MAX_KB and cap > 8 and len(js) > CHART_MAX_KB * 1024:
+        cap //= 2
+        smaller = build(cap)
+        s = smaller.to_json()
+        if s == js: break
+        fig, js = smaller, s
+    return fig
+
+@st.cache_resource(max_entries=64)
+def cached_figure(version, chart, mode, cap, _build):
+    """Plotly figure `chart` for one snapshot version and mode, built once and
+    shared by every session; st.plotly_chart only reads it. Charts plot
+    all-time data, so the period epoch is not part of the key."""
+    return fit(_build, cap)
+
+def figure(k, chart, build, cap=CHART_MAX_POINTS):
+    """build(cap) sized by fit(), through cached_figure() when k came from
+    Poller.calc(). Bar and pie charts pass cap=CHART_TOP_N."""
+    if "version" not in k: return fit(build, cap)
+    return cached_figure(k["version"], chart, k["mode"], cap, build)
+
+# ============================================================
+# JSON API
+# ============================================================
+API_PORT = int(os.environ.get("DASHBOARD_API_PORT", "0"))  # 0 keeps the API off the dashboard server
+API_SERVE_PORT = 8502  # `python app.py api` without DASHBOARD_API_PORT
+API_HOST = os.environ.get("DASHBOARD_API_HOST", "127.0.0.1")  # loopback unless exposed on purpose
+API_SECTIONS = ["kpis", "agents", "destinations"]
+STREAM_POLL = 0.5  # seconds between snapshot-version checks per stream
+STREAM_PING = 15  # seconds of silence before a keep-alive comment
+STREAM_MAX_ROWS = 50  # most failed rows one delta event carries
+
+def api_token():
+    """Bearer token guarding admin figures: DASHBOARD_API_TOKEN, else the
+    `api_token` secret. None leaves admin mode switched off."""
+    token = os.environ.get("DASHBOARD_API_TOKEN")
+    if token: return token
+    try: return st.secrets.get("api_token") or None
+    except Exception: return None
+
+def ranked(c):
+    return [{"name": str(a), "count": int(b)} for a, b in c.items()]
+
+def api_payload(k, admin=False):
+    """The calc() figures as JSON-ready dicts, one per API section. Figures
+    only the admin views show (failure breakdowns, per-agent rates, the
+    custom-period leaderboards) are included for `admin` alone."""
+    kpis = {key: int(k[key]) for key in ["total","done","pend","failed","td","yd","tw","lw","tm","lm"]}
+    kpis.update({key: round(float(k[key]), 2) for key in ["rate","dp","wp","mp"]})
+    agents = {"all_time": ranked(k["ac"]), "today": ranked(k["ac_t"]), "week": ranked(k["ac_w"]),
+              "month": ranked(k["ac_m"]), "low": str(k["low"])}
+    if admin:
+        kpis.update({key: int(k[key]) for key in ["tc_custom","tc_prev","failed_today","failed_week","failed_month","failed_custom"]})
+        stats = {str(a): {key: round(float(v), 2) if key.endswith("rate") else int(v) for key, v in row.items()}
+                 for a, row in k["agent_success_rates"].items()}
+        agents.update({"custom": ranked(k["ac_custom"]), "prev_custom": ranked(k["ac_prev"]),
+                       "failed": ranked(k["failed_by_agent"]), "stats": stats})
+    return {
+        "kpis": kpis,
+        "agents": agents,
+        "destinations": {"top": str(k["dest"]), "top_n": int(k["dest_n"]), "counts": ranked(k["tc"])},
+    }
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+def live_state(snap):
+    """What the live stream diffs between snapshots: all-time status counts,
+    agent ranks on the completed leaderboard and the ingested row count."""
+    cube = snap["cube"] if snap["cube"] is not None else build_cube(snap["df"])
+    by_kind = cube.groupby("Kind", observed=False)["n"].sum()
+    ac = tally(cube[cube["Kind"] == "done"], "Agent Name")
+    return {"version": snap["version"], "full_at": snap["full_at"], "rows": len(snap["df"]),
+            "done": int(by_kind.get("done", 0)), "failed": int(by_kind.get("failed", 0)), "pend": int(by_kind.get("pend", 0)),
+            "ranks": {str(a): i for i, a in enumerate(ac.index, 1)}}
+
+def live_delta(old, new, df):
+    """('delta', changes) from `old` to `new` live state: counts that moved,
+    agents whose rank changed (None once off the board) and the latest
+    STREAM_MAX_ROWS failed rows appended since (with failed_rows_skipped
+    counting the rest). A full re-read can rewrite older rows, so it yields
+    ('snapshot', new) instead."""
+    if new["full_at"] != old["full_at"] or new["rows"] < old["rows"]:
+        return "snapshot", new
+    d = {"version": new["version"]}
+    d.update({key: new[key] for key in ("done","failed","pend") if new[key] != old[key]})
+    ranks = {a: r for a, r in new["ranks"].items() if old["ranks"].get(a) != r}
+    ranks.update({a: None for a in old["ranks"] if a not in new["ranks"]})
+    if ranks: d["ranks"] = ranks
+    added = df.iloc[old["rows"]:new["rows"]]
+    added = added[added["IsFailed"] == True]
+    if len(added) > STREAM_MAX_ROWS:
+        d["failed_rows_skipped"] = len(added) - STREAM_MAX_ROWS
+        added = added.iloc[-STREAM_MAX_ROWS:]
+    if len(added):
+        cols = ["Timestamp","Agent Name","Customer Name:","Transfer to:","Status"]
+        d["failed_rows"] = [{c: (None if pd.isna(v) else v.isoformat() if c == "Timestamp" else str(v)) for c, v in zip(cols, r)}
+                            for r in added[cols].itertuples(index=False)]
+    return "delta", d
+
+class Api:
+    """Read-only JSON view of the poller's latest snapshot for wallboards and bots.
+
+    Serves the same figures calc() gives the dashboard, but never touches
+    Sheets: bodies are built once per (snapshot version, mode, period epoch)
+    and the ETag is derived from that key alone, so a matching If-None-Match
+    is answered with 304 before any work is done. Admin mode and the live
+    stream (which carries failed rows) need `Authorization: Bearer <token>`;
+    without a configured token they are off."""
+
+    def __init__(self, poller, token=None):
+        self.poller = poller
+        self.token = token
+        self.boot = f"{int(time.time()):x}"  # keeps ETags from a previous process from matching
+        self.memo, self.memo_version = {}, None
+        self.lock = threading.Lock()
+        self.live, self.deltas = {}, {}
+        self.app = Starlette(routes=[Route("/api/health", self.health), Route("/api/stream", self.stream)] +
+                             [Route(f"/api/{name}", self.section(name)) for name in API_SECTIONS])
+
+    def key(self, mode):
+        n = clock()
+        snap = self.poller.snapshot()
+        day, custom = period_epoch(n)
+        etag = f'"{self.boot}-{snap["version"]}-{mode}-{day:%Y%m%d}-{custom:%Y%m%d%H}"'
+        return etag, snap, n
+
+    def authorized(self, request):
+        sent = request.headers.get("authorization", "")
+        return bool(self.token) and sent.startswith("Bearer ") and \
+            hmac.compare_digest(sent[7:].strip().encode(), self.token.encode())
+
+    def denied(self):
+        return JSONResponse({"error": "bearer token required" if self.token else "no API token configured"},
+                            status_code=401, headers={"WWW-Authenticate": "Bearer"})
+
+    def bodies(self, etag, snap, mode, n):
+        with self.lock:
+            hit = self.memo.get(etag)
+        if hit is None:
+            k = self.poller.calc(snap, mode == "admin", n)
+            hit = {name: json.dumps(v).encode() for name, v in api_payload(k, mode == "admin").items()} if k else {}
+            with self.lock:
+                if self.memo_version != snap["version"]:
+                    self.memo, self.memo_version = {}, snap["version"]
+                self.memo[etag] = hit
+        return hit
+
+    def section(self, name):
+        async def endpoint(request):
+            mode = "admin" if request.query_params.get("mode") == "admin" else "user"
+            if mode == "admin" and not self.authorized(request):
+                return self.denied()
+            etag, snap, n = self.key(mode)
+            sent = [t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")]
+            if etag in sent or "*" in sent:
+                return Response(status_code=304, headers={"ETag": etag})
+            with self.lock:
+                hit = self.memo.get(etag)
+            if hit is None:
+                hit = await run_in_threadpool(self.bodies, etag, snap, mode, n)
+            if name not in hit:
+                return JSONResponse({"error": "no data yet"}, status_code=503)
+            return Response(hit[name], media_type="application/json",
+                            headers={"ETag": etag, "Cache-Control": "no-cache"})
+        return endpoint
+
+    def live_for(self, snap):
+        """live_state() once per snapshot version, shared by every stream."""
+        with self.lock:
+            hit = self.live.get(snap["version"])
+        if hit is None:
+            hit = live_state(snap)
+            with self.lock:
+                self.live = {v: l for v, l in self.live.items() if v >= snap["version"] - 1}
+                self.live[snap["version"]] = hit
+        return hit
+
+    def delta_for(self, old, snap):
+        """The (event, data) message from `old` to `snap`, built once per version pair."""
+        key = (old["version"], snap["version"])
+        with self.lock:
+            hit = self.deltas.get(key)
+        if hit is None:
+            hit = live_delta(old, self.live_for(snap), snap["df"])
+            with self.lock:
+                self.deltas = {k: m for k, m in self.deltas.items() if k[1] >= snap["version"] - 1}
+                self.deltas[key] = hit
+        return hit
+
+    async def stream(self, request):
+        """Server-Sent Events: one 'snapshot' event with the current live
+        state, then a small 'delta' event as soon as a new snapshot lands
+        (checked every STREAM_POLL seconds, no Sheets access)."""
+        if not self.authorized(request):
+            return self.denied()
+        async def events():
+            cur = await run_in_threadpool(self.live_for, self.poller.snapshot())
+            yield sse("snapshot", cur)
+            quiet = 0.0
+            while not await request.is_disconnected():
+                await asyncio.sleep(STREAM_POLL)
+                snap = self.poller.snapshot()
+                if snap["version"] == cur["version"]:
+                    quiet += STREAM_POLL
+                    if quiet >= STREAM_PING:
+                        quiet = 0.0
+                        yield b": ping\n\n"
+                    continue
+                event, data = await run_in_threadpool(self.delta_for, cur, snap)
+                cur, quiet = self.live_for(snap), 0.0
+                yield sse(event, data)
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def health(self, request):
+        snap, age = self.poller.snapshot(), self.poller.age()
+        return JSONResponse({"version": snap["version"], "rows": len(snap["df"]),
+                             "age": None if age is None else round(age, 1),
+                             "refreshing": self.poller.refreshing, "error": snap["error"]},
+                            headers={"Cache-Control": "no-cache"})
+
+@st.cache_resource
+def start_api(_poller):
+    """Serve Api on API_HOST:API_PORT from a daemon thread, once per server
+    process. Called from main(), so it only comes up with the first page view;
+    serve_api() runs the API without the dashboard."""
+    api = Api(_poller, api_token())
+    server = uvicorn.Server(uvicorn.Config(api.app, host=API_HOST, port=API_PORT, log_level="warning"))
+    threading.Thread(target=server.run, name="kpi-api", daemon=True).start()
+    return api
+
+def serve_api():
+    """`python app.py api`: run the API in the foreground with its own Poller,
+    no Streamlit server or browser session needed. Leave DASHBOARD_API_PORT
+    unset on the dashboard itself when both run, or they fight over the port."""
+    api = Api(Poller(), api_token())
+    uvicorn.run(api.app, host=API_HOST, port=API_PORT or API_SERVE_PORT, log_level="warning")
+
 # ============================================================
 # ADMIN VIEWS
 # ============================================================
@@ -926,16 +2011,18 @@ def view_failed_transfers(k):
         failed_by_agent = k.get("failed_by_agent", pd.Series())
         if not failed_by_agent.empty and len(failed_by_agent) > 0:
             try:
-                failed_df = failed_by_agent.reset_index()
-                failed_df.columns = ['Agent', 'Failed Count']
-                failed_df = failed_df.sort_values('Failed Count', ascending=True)
-                
-                fig = px.bar(failed_df, y='Agent', x='Failed Count', title="Failed Transfers per Agent",
-                            orientation='h', color='Failed Count',
-                            color_continuous_scale=['rgba(255,255,255,0.05)', '#EF4444'])
-                fig.update_layout(height=400, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
-                                font=dict(family='Inter',color='white'), margin=dict(t=40,b=20,l=20,r=20))
-                st.plotly_chart(fig, use_container_width=True)
+                def build(cap):
+                    failed_df = top_n(failed_by_agent, cap).reset_index()
+                    failed_df.columns = ['Agent', 'Failed Count']
+                    failed_df = failed_df.sort_values('Failed Count', ascending=True)
+                    
+                    fig = px.bar(failed_df, y='Agent', x='Failed Count', title="Failed Transfers per Agent",
+                                orientation='h', color='Failed Count',
+                                color_continuous_scale=['rgba(255,255,255,0.05)', '#EF4444'])
+                    fig.update_layout(height=400, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                    font=dict(family='Inter',color='white'), margin=dict(t=40,b=20,l=20,r=20))
+                    return fig
+                st.plotly_chart(figure(k, "failed_by_agent", build, CHART_TOP_N), use_container_width=True)
             except Exception as e:
                 st.info("No failed transfers data to display")
         else:
@@ -995,15 +2082,25 @@ def view_agent_success_rates(k):
             agent_df = agent_df.sort_values("Success Rate %", ascending=False)
             
             try:
-                fig = px.bar(agent_df, x='Agent', y=['Success Rate %', 'Fail Rate %'], 
-                            title="Agent Performance Metrics",
-                            barmode='group',
-                            color_discrete_map={'Success Rate %': '#10B981', 'Fail Rate %': '#EF4444'})
-                fig.update_layout(height=450, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
-                                 font=dict(family='Inter',color='white'), margin=dict(t=40,b=40,l=40,r=40),
-                                 xaxis_tickangle=-45)
-                fig.update_yaxes(title="Percentage (%)", range=[0, 100])
-                st.plotly_chart(fig, use_container_width=True)
+                def build(cap):
+                    # past the cap: busiest agents plus one pooled "Others" bar
+                    top = agent_df.nlargest(cap, "Total") if len(agent_df) > cap else agent_df
+                    if len(agent_df) > cap:
+                        rest = agent_df.drop(top.index)[["Completed","Failed","Total"]].sum()
+                        top = pd.concat([top, pd.DataFrame([{"Agent": "Others", **rest,
+                            "Success Rate %": round(rest["Completed"] / rest["Total"] * 100, 1) if rest["Total"] else 0,
+                            "Fail Rate %": round(rest["Failed"] / rest["Total"] * 100, 1) if rest["Total"] else 0}])])
+                        top = top.sort_values("Success Rate %", ascending=False, kind="stable")
+                    fig = px.bar(top, x='Agent', y=['Success Rate %', 'Fail Rate %'], 
+                                title="Agent Performance Metrics",
+                                barmode='group',
+                                color_discrete_map={'Success Rate %': '#10B981', 'Fail Rate %': '#EF4444'})
+                    fig.update_layout(height=450, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                                     font=dict(family='Inter',color='white'), margin=dict(t=40,b=40,l=40,r=40),
+                                     xaxis_tickangle=-45)
+                    fig.update_yaxes(title="Percentage (%)", range=[0, 100])
+                    return fig
+                st.plotly_chart(figure(k, "agent_rates", build, CHART_TOP_N), use_container_width=True)
             except Exception as e:
                 st.info("Could not create performance chart")
             
@@ -1066,19 +2163,8 @@ def view_custom_period_performance(k):
     
     ac_custom = k.get("ac_custom", pd.Series())
     if not ac_custom.empty and len(ac_custom) > 0:
-        st.markdown('<p style="font-weight:700;margin-top:20px;">🏆 Top Performers (Custom Period)</p>', unsafe_allow_html=True)
-        
-        for i, (agent, count) in enumerate(ac_custom.head(5).items(), 1):
-            medal = {1:"🥇",2:"🥈",3:"🥉"}.get(i, f"{i}.")
-            st.markdown(f"""
-            <div class="rank-row" style="animation-delay:{i*0.05}s;">
-                <div style="display:flex;align-items:center;gap:12px;">
-                    <span style="font-size:20px;">{medal}</span>
-                    <span style="font-weight:700;font-size:16px;">{agent}</span>
-                </div>
-                <span style="font-weight:800;font-size:20px;">{int(count)}</span>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown('<p style="font-weight:700;margin-top:20px;">🏆 Top Performers (Custom Period)</p>\n'
+                    + rank_rows(ac_custom, 5, bars=False), unsafe_allow_html=True)
     else:
         st.info("No data available for custom period")
     
@@ -1092,30 +2178,43 @@ def view_admin_transfers(k):
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         
         try:
+            # filter, sort and page over precomputed positions; only the visible page is materialized
+            idx = k.get("failed_idx") or agent_index(failed_df)
             col1, col2 = st.columns(2)
             with col1:
-                agents = ["All"] + sorted(failed_df["Agent Name"].dropna().unique().tolist())
+                agents = ["All"] + sorted(idx)
                 selected_agent = st.selectbox("Filter by Agent:", agents, key="admin_agent_filter")
             with col2:
-                min_date = failed_df["Timestamp"].min().date() if not failed_df.empty else datetime.now().date()
-                max_date = failed_df["Timestamp"].max().date() if not failed_df.empty else datetime.now().date()
+                min_date = failed_df["Timestamp"].iloc[0].date()
+                max_date = failed_df["Timestamp"].iloc[-1].date()
                 date_range = st.date_input("Date Range:", 
                                            value=(min_date, max_date),
                                            key="admin_date_filter")
             
-            filtered_failed = failed_df.copy()
-            if selected_agent != "All":
-                filtered_failed = filtered_failed[filtered_failed["Agent Name"] == selected_agent]
+            pos = range(len(failed_df)) if selected_agent == "All" else idx.get(selected_agent, range(0))
             if len(date_range) == 2:
-                filtered_failed = filtered_failed[(filtered_failed["Timestamp"].dt.date >= date_range[0]) &
-                                                  (filtered_failed["Timestamp"].dt.date <= date_range[1])]
+                pos = span(failed_df, pos, date_range[0], date_range[1])
             
             display_cols = ["Timestamp", "Agent Name", "Customer Name:", "Transfer to:", "Status", "FeedBack", "H comments"]
-            available_cols = [c for c in display_cols if c in filtered_failed.columns]
+            available_cols = [c for c in display_cols if c in failed_df.columns]
             
-            if not filtered_failed.empty:
-                st.markdown(f'<p style="font-weight:700;">Failed Transfers: {len(filtered_failed)} records</p>', unsafe_allow_html=True)
-                st.dataframe(filtered_failed[available_cols].sort_values("Timestamp", ascending=False), 
+            if len(pos):
+                c1, c2, c3 = st.columns(3)
+                with c1: sort_col = st.selectbox("Sort by:", [c for c in ["Timestamp", "Agent Name", "Transfer to:", "Status"]
+                                                              if c in failed_df.columns], key="admin_failed_sort")
+                with c2: desc = st.radio("Order:", ["Descending", "Ascending"], horizontal=True,
+                                         key="admin_failed_order") == "Descending"
+                with c3: size = st.selectbox("Rows per page:", [25, 50, 100, 250], key="admin_failed_size")
+                pages = (len(pos) - 1) // size + 1
+                if st.session_state.get("admin_failed_page", 1) > pages:
+                    st.session_state.admin_failed_page = pages
+                c1, c2 = st.columns([3, 1])
+                # no max_value: it is part of the widget's identity, so a changing
+                # page count would reset the page to 1; bounded by hand instead
+                with c2: page = min(int(st.number_input("Page:", min_value=1, step=1, key="admin_failed_page")), pages)
+                with c1: st.markdown(f'<p style="font-weight:700;">Failed Transfers: {len(pos)} records · page {page} of {pages}</p>', unsafe_allow_html=True)
+                rows = sort_positions(failed_df, pos, sort_col, desc)[(page - 1) * size:page * size]
+                st.dataframe(failed_df.iloc[np.asarray(rows)][available_cols],
                             use_container_width=True, hide_index=True)
             else:
                 st.info("No failed transfers match the filters")
@@ -1126,6 +2225,24 @@ def view_admin_transfers(k):
     else:
         st.markdown('<div class="glass-card"><p>✅ No failed transfers recorded. All transfers completed successfully!</p></div>', unsafe_allow_html=True)
 
+def view_admin_perf(poller, run):
+    """Admin-only timings panel: this rerun, rolling stats for every stage
+    (Sheets round-trip and parsing from the poller, calc and views from
+    reruns across sessions), cache hits and snapshot freshness."""
+    with st.expander("⏱️ Performance", expanded=False):
+        snap, counts = poller.snapshot(), dict(poller.perf.counts)
+        hits, misses = counts.get("calc cache hit", 0), counts.get("calc cache miss", 0)
+        age = poller.age()
+        c1,c2,c3,c4 = st.columns(4)
+        with c1: st.metric("This rerun", f"{run.get('rerun', 0):,.0f} ms")
+        with c2: st.metric("Snapshot age", "—" if age is None else f"{age:.0f}s", f"version {snap['version']}", delta_color="off")
+        with c3: st.metric("Rows", f"{len(snap['df']):,}", f"{poller.state['rows']:,} ingested", delta_color="off")
+        with c4: st.metric("calc() cache", f"{hits / max(hits + misses, 1):.0%} hits", f"{hits} hit · {misses} miss", delta_color="off")
+        tbl = poller.perf.table()
+        if not tbl.empty:
+            tbl["This rerun ms"] = tbl["Stage"].map(run)
+            st.dataframe(tbl.round(2), use_container_width=True, hide_index=True)
+
 # ============================================================
 # REGULAR VIEWS (Original)
 # ============================================================
@@ -1210,36 +2327,19 @@ def view_performers(k):
                     st.info("No completed transfers yet")
         st.markdown('</div>', unsafe_allow_html=True)
     with c2:
-        st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-        st.markdown('<div style="display:flex;align-items:center;gap:12px;margin-bottom:16px;"><div class="card-ico">📈</div><div><strong style="font-size:17px;color:white !important;">Agent Rankings</strong><p style="margin:2px 0 0 0;font-size:12px;color:rgba(255,255,255,0.85) !important;">All-time completed transfers</p></div></div>', unsafe_allow_html=True)
+        # One element for the whole card: header, rows and insight together
+        head = '<div style="display:flex;align-items:center;gap:12px;margin-bottom:16px;"><div class="card-ico">📈</div><div><strong style="font-size:17px;color:white !important;">Agent Rankings</strong><p style="margin:2px 0 0 0;font-size:12px;color:rgba(255,255,255,0.85) !important;">All-time completed transfers</p></div></div>'
         ac = k.get("ac",pd.Series())
         if not ac.empty:
-            low = k.get("low",""); mx = ac.max()
-            for i,(ag,cnt) in enumerate(ac.head(10).items(),1):
-                m = {1:"🥇",2:"🥈",3:"🥉"}.get(i,f'<span style="color:white !important;font-weight:700;">{i}.</span>')
-                bw = (cnt/mx*100) if mx>0 else 0
-                is_low = ag==low and len(ac)>1
-                st.markdown(f"""
-                <div class="rank-row {"rank-low" if is_low else ""}" style="animation-delay:{i*0.06}s;">
-                    <div style="flex:1;">
-                        <div style="display:flex;align-items:center;gap:8px;">
-                            <span style="font-size:16px;">{m}</span>
-                            <span style="font-weight:700;color:white !important;font-size:14px;">{ag}</span>
-                        </div>
-                        <div class="bar-track"><div class="bar-fill" style="width:{bw}%;animation-delay:{i*0.06}s;"></div></div>
-                    </div>
-                    <span style="color:white !important;font-weight:800;font-size:18px;margin-left:12px;">{int(cnt)}</span>
-                </div>""", unsafe_allow_html=True)
-            if len(ac)>1:
-                st.markdown(f"""
-                <div class="insight-box insight-danger">
-                    <span style="font-size:22px;">📉</span>
-                    <div><strong style="color:white !important;font-size:12px;">Needs Support</strong>
-                    <p style="margin:2px 0 0 0;font-size:13px;color:white !important;">{low} ({int(ac.min())} transfers)</p></div>
-                </div>""", unsafe_allow_html=True)
+            low = k.get("low","") if len(ac)>1 else None
+            insight = f"""
+<div class="insight-box insight-danger"><span style="font-size:22px;">📉</span>
+<div><strong style="color:white !important;font-size:12px;">Needs Support</strong>
+<p style="margin:2px 0 0 0;font-size:13px;color:white !important;">{html.escape(str(low))} ({int(ac.min())} transfers)</p></div></div>""" if len(ac)>1 else ""
+            st.markdown(f'<div class="glass-card">{head}\n{rank_rows(ac, 10, low)}{insight}</div>', unsafe_allow_html=True)
         else:
+            st.markdown(f'<div class="glass-card">{head}</div>', unsafe_allow_html=True)
             st.info("No agent data")
-        st.markdown('</div>', unsafe_allow_html=True)
 
 def view_transfers(k):
     st.markdown('<div class="section-title"><div class="section-dot"></div> Transfer Analysis</div>', unsafe_allow_html=True)
@@ -1250,21 +2350,24 @@ def view_transfers(k):
         c1,c2 = st.columns(2)
         lo = dict(height=380, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
                   font=dict(family='Inter',color='white'), margin=dict(t=40,b=20,l=20,r=20))
-        with c1:
-            fig = px.pie(values=tc.values,names=tc.index,title="Distribution",
+        def pie(cap):
+            tp = top_n(tc, cap)
+            fig = px.pie(values=tp.values,names=tp.index,title="Distribution",
                 color_discrete_sequence=['#4F46E5','#06B6D4','#8B5CF6','#10B981','#F59E0B','#312E81'])
             fig.update_layout(**lo)
             fig.update_traces(textposition='inside',textinfo='percent+label',hole=0.45,
                 marker=dict(line=dict(color='#0A0E27',width=2)))
-            st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            tf = tc.reset_index(); tf.columns = ['Destination','Count']
+            return fig
+        def bar(cap):
+            tf = top_n(tc, cap).reset_index(); tf.columns = ['Destination','Count']
             tf = tf.sort_values('Count',ascending=True)
             fig = px.bar(tf,y='Destination',x='Count',title="By Destination",orientation='h',
                 color='Count',color_continuous_scale=['rgba(255,255,255,0.05)','#4F46E5'])
             fig.update_layout(**lo,coloraxis_showscale=False)
             fig.update_traces(marker_line_width=0)
-            st.plotly_chart(fig,use_container_width=True)
+            return fig
+        with c1: st.plotly_chart(figure(k, "dest_pie", pie, CHART_TOP_N),use_container_width=True)
+        with c2: st.plotly_chart(figure(k, "dest_bar", bar, CHART_TOP_N),use_container_width=True)
         st.markdown(f"""
         <div class="highlight-box">
             <div class="hl-ico">🎯</div>
@@ -1287,22 +2390,27 @@ def view_agents(k):
         names = sorted(ac.index.tolist())
         sel = st.selectbox("Select Agent:",["All Agents"]+names,key="asel")
         dd = k.get("done_df",pd.DataFrame())
-        filt = dd if sel=="All Agents" else dd[dd["Agent Name"]==sel]
-        tdf,wdf,mdf = k["tdf"],k["wdf"],k["mdf"]
+        # done_df is time-sorted and partitioned by agent once per snapshot (done_idx);
+        # window counts come from the cube tallies, so a selection is lookups only
         if sel!="All Agents":
-            t=len(tdf[tdf["Agent Name"]==sel]); w=len(wdf[wdf["Agent Name"]==sel]); m=len(mdf[mdf["Agent Name"]==sel])
-        else: t,w,m = k["td"],k["tw"],k["tm"]
+            pos = k.get("done_idx",{}).get(sel, np.arange(0))
+            n = len(pos)
+            t,w,m = (int(k[c].get(sel,0)) for c in ("ac_t","ac_w","ac_m"))
+        else:
+            pos = range(len(dd))
+            n = len(dd)
+            t,w,m = k["td"],k["tw"],k["tm"]
         mc1,mc2,mc3,mc4 = st.columns(4)
-        with mc1: st.metric("🎯 Total Done",len(filt))
+        with mc1: st.metric("🎯 Total Done",n)
         with mc2: st.metric("📅 Today",t)
         with mc3: st.metric("📆 This Week",w)
         with mc4: st.metric("🗓️ This Month",m)
-        if not filt.empty:
+        if n:
             lbl = f" — {sel}" if sel!="All Agents" else ""
             st.markdown(f'<p style="color:white !important;font-weight:700;margin-top:20px;margin-bottom:8px;">Recent Completed Transfers{lbl}</p>',unsafe_allow_html=True)
-            avail = [c for c in ["Timestamp","Agent Name","Customer Name:","Transfer to:","Status","Electric Bill:","Credit Score:"] if c in filt.columns]
+            avail = [c for c in ["Timestamp","Agent Name","Customer Name:","Transfer to:","Status","Electric Bill:","Credit Score:"] if c in dd.columns]
             if avail:
-                recent = filt[avail].sort_values("Timestamp",ascending=False).head(10)
+                recent = dd.iloc[np.asarray(pos[-10:][::-1])][avail]
                 show = recent.copy()
                 if "Status" in show.columns:
                     show["Status"] = show["Status"].apply(lambda x: "✅ Done" if str(x).strip()=="done" else f"⏳ {str(x).title()}")
@@ -1318,43 +2426,47 @@ def view_trends(k):
     st.markdown('<div style="display:flex;align-items:center;gap:12px;margin-bottom:16px;"><div class="card-ico">📈</div><div><strong style="font-size:17px;color:white !important;">Time Series</strong><p style="margin:2px 0 0 0;font-size:12px;color:rgba(255,255,255,0.85) !important;">Completed transfer trends</p></div></div>', unsafe_allow_html=True)
     dd = k.get("done_df",pd.DataFrame())
     if not dd.empty:
-        df = dd.copy()
-        df['Date'] = df['Timestamp'].dt.date
-        daily = df.groupby('Date').size().reset_index(name='Transfers')
-        df['Wk'] = df['Timestamp'].dt.isocalendar().week
-        df['Yr'] = df['Timestamp'].dt.year
-        weekly = df.groupby(['Yr','Wk']).size().reset_index(name='Transfers')
-        weekly['Lbl'] = weekly['Yr'].astype(str)+'-W'+weekly['Wk'].astype(str).str.zfill(2)
-        df['Mo'] = df['Timestamp'].dt.to_period('M')
-        monthly = df.groupby('Mo').size().reset_index(name='Transfers')
-        monthly['Mo'] = monthly['Mo'].astype(str)
+        tr = k.get("trends") or build_trends(dd)
+        daily = tr["D"].rename_axis('Date').reset_index(name='Transfers')
+        weekly = tr["W"].rename_axis('Wk').reset_index(name='Transfers')
+        weekly['Lbl'] = weekly['Wk'].dt.strftime('%G-W%V')
+        monthly = tr["M"].rename_axis('Mo').reset_index(name='Transfers')
+        monthly['Mo'] = monthly['Mo'].dt.strftime('%Y-%m')
         lo = dict(height=380, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
                   font=dict(family='Inter',color='white'), margin=dict(t=40,b=40,l=40,r=20),
                   xaxis=dict(gridcolor='rgba(255,255,255,0.04)',zeroline=False),
                   yaxis=dict(gridcolor='rgba(255,255,255,0.04)',zeroline=False))
         t1,t2,t3 = st.tabs(["Daily","Weekly","Monthly"])
-        with t1:
-            if len(daily)>1:
-                fig = px.area(daily,x='Date',y='Transfers',title="Daily Trend",markers=True)
+        def area(cap):
+            d = daily.iloc[lttb(daily['Date'], daily['Transfers'], cap)]
+            if len(d) > CHART_WEBGL:
+                # long history: WebGL line without per-point markers
+                fig = px.line(d,x='Date',y='Transfers',title="Daily Trend",render_mode='webgl')
+                fig.update_traces(line_color='#818CF8',fill='tozeroy',fillcolor='rgba(79,70,229,0.08)')
+            else:
+                fig = px.area(d,x='Date',y='Transfers',title="Daily Trend",markers=True)
                 fig.update_traces(line_color='#818CF8',fill='tozeroy',fillcolor='rgba(79,70,229,0.08)',
                     marker=dict(color='#06B6D4',size=8,line=dict(color='#0A0E27',width=2)))
-                fig.update_layout(**lo); st.plotly_chart(fig,use_container_width=True)
+            fig.update_layout(**lo)
+            return fig
+        def bars(d, x, title, top):
+            def build(cap):
+                fig = px.bar(d,x=x,y='Transfers',title=title,
+                    color='Transfers',color_continuous_scale=['rgba(255,255,255,0.03)',top])
+                fig.update_layout(**lo,xaxis_tickangle=-45,coloraxis_showscale=False)
+                fig.update_traces(marker_line_width=0)
+                return fig
+            return build
+        with t1:
+            if len(daily)>1: st.plotly_chart(figure(k, "trend_daily", area),use_container_width=True)
             else: st.info("Insufficient data")
         with t2:
             if len(weekly)>1:
-                fig = px.bar(weekly,x='Lbl',y='Transfers',title="Weekly Trend",
-                    color='Transfers',color_continuous_scale=['rgba(255,255,255,0.03)','#4F46E5'])
-                fig.update_layout(**lo,xaxis_tickangle=-45,coloraxis_showscale=False)
-                fig.update_traces(marker_line_width=0)
-                st.plotly_chart(fig,use_container_width=True)
+                st.plotly_chart(figure(k, "trend_weekly", bars(weekly, 'Lbl', "Weekly Trend", '#4F46E5')),use_container_width=True)
             else: st.info("Insufficient data")
         with t3:
             if len(monthly)>1:
-                fig = px.bar(monthly,x='Mo',y='Transfers',title="Monthly Trend",
-                    color='Transfers',color_continuous_scale=['rgba(255,255,255,0.03)','#312E81'])
-                fig.update_layout(**lo,xaxis_tickangle=-45,coloraxis_showscale=False)
-                fig.update_traces(marker_line_width=0)
-                st.plotly_chart(fig,use_container_width=True)
+                st.plotly_chart(figure(k, "trend_monthly", bars(monthly, 'Mo', "Monthly Trend", '#312E81')),use_container_width=True)
             else: st.info("Insufficient data")
     else:
         st.info("No completed transfer data")
@@ -1426,6 +2538,9 @@ def main():
     if "pending_admin_auth" not in st.session_state:
         st.session_state.pending_admin_auth = False
     
+    if API_PORT:
+        start_api(get_poller())
+    
     # Show mode selector if not authenticated
     if not st.session_state.authenticated and not st.session_state.pending_admin_auth:
         mode_selector()
@@ -1436,53 +2551,15 @@ def main():
         admin_login_modal()
         return
     
-    # Load data
-    with st.spinner("Connecting to Google Sheets..."):
-        df = fetch_data()
-    
-    if df.empty:
-        st.markdown("""
-        <div class="warn-card">
-            <h3 style="color:white !important;margin-top:0;">⚠️ No data available</h3>
-            <p style="color:white !important;line-height:1.8;">
-                <strong>Check:</strong><br>
-                1. Google Sheet shared with service account<br>
-                2. Data exists in "Form Responses 1"<br>
-                3. Secrets configured in Streamlit Cloud
-            </p>
-        </div>""", unsafe_allow_html=True)
-        time.sleep(45)
-        st.rerun()
-    
-    if len(df) <= 1:
-        st.warning("Sheet has only headers. Waiting for data...")
-        time.sleep(45)
-        st.rerun()
-    
-    # Calculate based on view mode
     if st.session_state.view_mode == "admin":
-        k = calc(df, use_custom_range=True)
         view_admin_header()
     else:
-        k = calc(df, use_custom_range=False)
         view_header()
     
-    # Add mode switcher buttons at the top right
-    st.markdown("""
-    <style>
-    .mode-buttons {
-        position: fixed;
-        top: 20px;
-        right: 20px;
-        z-index: 1000;
-        display: flex;
-        gap: 10px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # Mode switching buttons
+    # Mode switching buttons (top-right placement is in THEME_CSS)
     col1, col2, col3 = st.columns([6, 1, 1])
+    with col1:
+        st.toggle("🔋 Low power", key="low_power", help="Turn off the animated background and looping animations")
     with col2:
         if st.button("👤 User", key="switch_user", use_container_width=True):
             st.session_state.view_mode = "user"
@@ -1496,44 +2573,96 @@ def main():
             elif password:
                 st.error("Wrong password")
     
+    live_view()
+    version_watch()
+
+AUTO_REFRESH = 45  # seconds between partial reruns of the data-bound sections
+VERSION_POLL = 2  # seconds between checks for a newer snapshot than the one on screen
+
+@st.experimental_fragment(run_every=VERSION_POLL)
+def version_watch():
+    """Rerun the page as soon as the poller publishes a snapshot newer than
+    the one live_view last rendered, instead of waiting out AUTO_REFRESH.
+    Renders nothing; an unchanged version costs one dict lookup."""
+    if get_poller().snapshot()["version"] != st.session_state.get("shown_version"):
+        st.rerun()
+
+@st.experimental_fragment(run_every=AUTO_REFRESH)
+def live_view():
+    """Data-bound part of the page. Re-run on a browser-side timer as a
+    fragment, so the page shell (theme CSS/JS, header, mode buttons) stays in
+    place and no script thread sleeps between refreshes."""
+    # Load data (latest background snapshot; only a cold start waits for the first fetch)
+    poller = get_poller()
+    if not poller.ready.is_set():
+        with st.spinner("Connecting to Google Sheets..."):
+            poller.snapshot(wait=60)
+    snap = poller.snapshot()
+    st.session_state.shown_version = snap["version"]
+    df = snap["df"]
+    
+    if df.empty:
+        if snap["error"]: st.error(f"Error: {snap['error']}")
+        st.markdown("""
+        <div class="warn-card">
+            <h3 style="color:white !important;margin-top:0;">⚠️ No data available</h3>
+            <p style="color:white !important;line-height:1.8;">
+                <strong>Check:</strong><br>
+                1. Google Sheet shared with service account<br>
+                2. Data exists in "Form Responses 1"<br>
+                3. Secrets configured in Streamlit Cloud
+            </p>
+        </div>""", unsafe_allow_html=True)
+        return
+    
+    if len(df) <= 1:
+        st.warning("Sheet has only headers. Waiting for data...")
+        return
+    
+    # Calculate based on view mode
+    perf, run, probe, t0 = poller.perf, {}, {}, time.perf_counter()
+    now = clock()
+    with perf.stage("calc", run):
+        k = poller.calc(snap, st.session_state.view_mode == "admin", now, probe)
+    perf.count("calc cache miss" if probe else "calc cache hit")
+    
     if not k:
         st.warning("No valid records found. Waiting...")
-        time.sleep(45)
-        st.rerun()
+        return
     
     # Summary banner
     st.markdown(f"""
     <div class="success-banner">
         ✅ Loaded <strong>{len(df)}</strong> records — <strong>{k.get('done', 0)} completed</strong> · 
-        {k.get('failed', 0)} failed · {k.get('pend', 0)} pending
+        {k.get('failed', 0)} failed · {k.get('pend', 0)} pending · {snapshot_status(poller)}
     </div>""", unsafe_allow_html=True)
     
     if st.session_state.view_mode == "admin":
-        view_admin_kpis(k)
-        view_failed_transfers(k)
-        view_agent_success_rates(k)
-        view_custom_period_performance(k)
-        view_admin_transfers(k)
-        view_performers(k)
-        view_transfers(k)
-        view_trends(k)
+        views = [view_admin_kpis, view_failed_transfers, view_agent_success_rates, view_custom_period_performance,
+                 view_admin_transfers, view_performers, view_transfers, view_trends]
     else:
-        view_kpis(k)
-        view_status(k)
-        view_performers(k)
-        view_transfers(k)
-        view_agents(k)
-        view_trends(k)
+        views = [view_kpis, view_status, view_performers, view_transfers, view_agents, view_trends]
+    for view in views:
+        with perf.stage(view.__name__, run):
+            view(k)
+    
+    age = poller.age()
+    perf.add("rerun", time.perf_counter() - t0, run)
+    log.info(json.dumps({"event": "rerun", "mode": st.session_state.view_mode, "version": snap["version"],
+                         "rows": len(df), "snapshot_age_s": None if age is None else round(age, 1),
+                         "calc_cache": "miss" if probe else "hit", "ms": run}))
+    if st.session_state.view_mode == "admin":
+        view_admin_perf(poller, run)
     
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    now = now.strftime("%Y-%m-%d %H:%M:%S")
     mode_text = "Admin Mode" if st.session_state.view_mode == "admin" else "User Mode"
     st.markdown(f"""
     <div class="footer-bar">
-        🟢 {mode_text} &nbsp;&nbsp;·&nbsp;&nbsp; Last updated: {now} &nbsp;&nbsp;·&nbsp;&nbsp; Next refresh in 45s
+        🟢 {mode_text} &nbsp;&nbsp;·&nbsp;&nbsp; Last updated: {now} &nbsp;&nbsp;·&nbsp;&nbsp; Next refresh in {AUTO_REFRESH}s
     </div>""", unsafe_allow_html=True)
-    
-    time.sleep(45)
-    st.rerun()
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == ["api"]:
+        serve_api()
+    else:
+        main()
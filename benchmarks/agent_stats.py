@@ -0,0 +1,73 @@
+"""Per-agent success/failure statistics: agent_stats() over the rollup cube
+(build included) vs the old per-agent mask loop from calc().
+
+    python benchmarks/agent_stats.py [--rows-per-agent 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import agent_stats, build_cube  # noqa: E402
+
+
+def loop_stats(df):
+    done = df[df["Status"] == "done"]
+    failed = df[df["IsFailed"] == True]
+    out = {}
+    for agent in df["Agent Name"].dropna().unique():
+        agent_total = len(df[df["Agent Name"] == agent])
+        agent_done = len(done[done["Agent Name"] == agent])
+        agent_failed = len(failed[failed["Agent Name"] == agent])
+        out[agent] = {
+            "total": agent_total,
+            "done": agent_done,
+            "failed": agent_failed,
+            "pending": agent_total - agent_done - agent_failed,
+            "success_rate": (agent_done / agent_total * 100) if agent_total > 0 else 0,
+            "fail_rate": (agent_failed / agent_total * 100) if agent_total > 0 else 0,
+        }
+    return out
+
+
+def frame(agents, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    status = rng.choice(["done", "done", "failed", "pending", "rejected"], rows)
+    return pd.DataFrame({
+        "Timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, rows), unit="s"),
+        "Agent Name": [f"Agent {i}" for i in rng.integers(0, agents, rows)],
+        "Transfer to:": rng.choice(["Sales", "Support", "Billing"], rows),
+        "Status": status,
+        "IsFailed": np.isin(status, ["failed", "rejected"]),
+    })
+
+
+def best(fn, df, repeat):
+    t = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(df)
+        t = min(t, time.perf_counter() - t0)
+    return t, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows-per-agent", type=int, default=20)
+    ap.add_argument("--agents", type=int, nargs="+", default=[100, 1000, 10000])
+    args = ap.parse_args()
+    print(f"{'agents':>8} {'rows':>9} {'loop s':>9} {'grouped s':>10} {'speedup':>8}")
+    for n in args.agents:
+        df = frame(n, n * args.rows_per_agent)
+        old, expected = best(loop_stats, df, 1 if n >= 10000 else 3)
+        new, got = best(lambda d: agent_stats(build_cube(d)), df, 5)
+        assert got == expected
+        print(f"{n:>8} {len(df):>9} {old:>9.3f} {new:>10.4f} {old / new:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
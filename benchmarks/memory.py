@@ -0,0 +1,77 @@
+"""Resident size of an ingested snapshot: the old all-object frame vs the typed
+ingest schema (categoricals, datetime64, bool, Arrow strings) of parse_rows().
+
+    python benchmarks/memory.py [--rows 200000] [--agents 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import parse_rows  # noqa: E402
+
+HDR = ["Timestamp", "Agent Name", "Transfer to:", "Customer Name:", "Electric Bill:",
+       "Credit Score:", "Status", "FeedBack", "H comments"]
+
+
+def sheet_rows(n, agents, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730 * 86400, n), unit="s")
+    status = rng.choice(["Done", "done", "Failed", "pending", "Rejected"], n)
+    return [[t.strftime("%m/%d/%Y %H:%M:%S"), f"Agent {a}", f"Dest {d}", f"Customer {i}",
+             str(b), str(c), s, "", ""]
+            for i, (t, a, d, b, c, s) in enumerate(zip(
+                ts, rng.integers(0, agents, n), rng.integers(0, 8, n),
+                rng.integers(50, 600, n), rng.integers(500, 850, n), status))]
+
+
+def object_frame(rows):
+    """The pre-schema ingest: every column an object column of Python strings."""
+    df = pd.DataFrame(rows, columns=HDR)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], format="%m/%d/%Y %H:%M:%S")
+    df["Status"] = df["Status"].astype(str).str.strip().str.lower()
+    df["IsFailed"] = df["Status"].isin(["failed", "reject", "rejected", "fail", "not done"])
+    return df
+
+
+def mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def timed(fn, repeat=5):
+    t = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - t0)
+    return t * 1000
+
+
+def report(name, df):
+    done = df[df["Status"] == "done"]
+    failed = df[df["IsFailed"]]
+    return [name, mb(df), mb(done), mb(failed),
+            timed(lambda: done["Agent Name"].value_counts()),
+            timed(lambda: df.groupby("Agent Name", observed=True).size())]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--agents", type=int, default=200)
+    args = ap.parse_args()
+    rows = sheet_rows(args.rows, args.agents)
+    res = [report("object", object_frame(rows)), report("typed", parse_rows(HDR, rows))]
+    print(f"{args.rows:,} rows, {args.agents} agents")
+    print(f"{'schema':<8} {'full MB':>9} {'done MB':>9} {'failed MB':>10} {'value_counts ms':>16} {'groupby ms':>11}")
+    for name, full, done, failed, vc_ms, gb_ms in res:
+        print(f"{name:<8} {full:>9.1f} {done:>9.1f} {failed:>10.1f} {vc_ms:>16.2f} {gb_ms:>11.2f}")
+    print(f"full frame: {res[0][1] / res[1][1]:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
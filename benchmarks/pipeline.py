@@ -0,0 +1,149 @@
+"""Scaling of the ingest -> calc -> render pipeline on synthetic sheets from
+fake_sheets.generate(): wall time, peak memory and allocations per stage.
+
+    python benchmarks/pipeline.py [--rows 1000 100000 1000000] [--agents 10 1000]
+                                  [--out pipeline.json] [--baseline old.json]
+
+Stages, run on every (rows, agents) pair:
+  read            read_sheet(): one typed, column-major batchGet of the used
+                  columns from the local stand-in (its CSV -> typed value
+                  conversion, server-side work for the real API, is done
+                  once up front and not timed)
+  parse           parse_columns(): serial timestamps, status parsing, typing
+  cube            build_cube(): the hourly rollup calc() counts from
+  trends          build_trends(): the daily/weekly/monthly series view_trends plots
+  calc:<mode>     calc() for the user and admin views
+  render:<view>   each view_* function with its mode's calc() output
+
+Wall time is the best of --repeat runs. Memory is a separate traced run:
+peak is tracemalloc's high-water mark above the stage's starting point,
+retained what the stage left allocated, and blocks the net change in live
+Python heap blocks. Results go to --out as JSON; --baseline compares wall
+times with an earlier file and exits 1 on any stage more than --tolerance
+slower. Render stages run Streamlit bare (no server), which still builds
+and serializes every element.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+os.environ.setdefault("DASHBOARD_CACHE_DIR", tempfile.mkdtemp())
+warnings.filterwarnings("ignore")
+logging.disable(logging.WARNING)
+
+import pandas as pd  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+import fake_sheets  # noqa: E402
+
+USER_VIEWS = ["view_kpis", "view_status", "view_performers", "view_transfers", "view_agents", "view_trends"]
+ADMIN_VIEWS = ["view_admin_kpis", "view_failed_transfers", "view_agent_success_rates",
+               "view_custom_period_performance", "view_admin_transfers"]
+
+
+def timed(fn, repeat):
+    t = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        t = min(t, time.perf_counter() - t0)
+    return t, out
+
+
+def traced(fn):
+    tracemalloc.reset_peak()
+    cur0 = tracemalloc.get_traced_memory()[0]
+    blocks0 = sys.getallocatedblocks()
+    out = fn()
+    cur, peak = tracemalloc.get_traced_memory()
+    return {"peak_mb": (peak - cur0) / 2**20, "retained_mb": (cur - cur0) / 2**20,
+            "blocks": sys.getallocatedblocks() - blocks0}, out
+
+
+def run(rows, agents, repeat):
+    """Stage records for one synthetic sheet."""
+    d = tempfile.mkdtemp()
+    path = os.path.join(d, "sheet.csv")
+    fake_sheets.write(path, fake_sheets.generate(rows, agents, seed=rows + agents))
+    vals = fake_sheets.FakeService(path).spreadsheets().values()
+
+    hdr, _ = app.read_sheet(vals, path, app.SHEET_TAB, None, 2)
+
+    def read():
+        return app.read_sheet(vals, path, app.SHEET_TAB, hdr, 2)[1]
+    read()
+
+    out = {}
+    stages = [("read", read),
+              ("parse", lambda: app.parse_columns(out["read"])),
+              ("cube", lambda: app.build_cube(out["parse"])),
+              ("trends", lambda: app.build_trends(out["parse"])),
+              ("calc:user", lambda: app.calc(out["parse"], False, cube=out["cube"], trends=out["trends"])),
+              ("calc:admin", lambda: app.calc(out["parse"], True, cube=out["cube"], trends=out["trends"]))]
+    stages += [(f"render:{v}", lambda v=v: getattr(app, v)(out["calc:user"])) for v in USER_VIEWS]
+    stages += [(f"render:{v}", lambda v=v: getattr(app, v)(out["calc:admin"])) for v in ADMIN_VIEWS]
+    res = []
+    for name, fn in stages:
+        wall, out[name] = timed(fn, 1 if rows >= 1_000_000 else repeat)
+        tracemalloc.start()
+        try:
+            mem, _ = traced(fn)
+        finally:
+            tracemalloc.stop()
+        res.append(dict({"rows": rows, "agents": agents, "stage": name, "wall_s": wall}, **mem))
+    os.remove(path)
+    os.rmdir(d)
+    return res
+
+
+def compare(res, baseline, tolerance):
+    """Stages more than `tolerance` times slower than the same stage in `baseline`."""
+    with open(baseline) as f:
+        old = {(r["rows"], r["agents"], r["stage"]): r["wall_s"] for r in json.load(f)["results"]}
+    slow = []
+    for r in res:
+        was = old.get((r["rows"], r["agents"], r["stage"]))
+        if was and r["wall_s"] > was * tolerance and r["wall_s"] - was > 0.005:
+            slow.append((r, was))
+    return slow
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    ap.add_argument("--agents", type=int, nargs="+", default=[10, 1_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default="pipeline.json")
+    ap.add_argument("--baseline")
+    ap.add_argument("--tolerance", type=float, default=1.25)
+    args = ap.parse_args()
+    res = []
+    print(f"{'rows':>9} {'agents':>7} {'stage':<40} {'wall s':>9} {'peak MB':>9} {'kept MB':>9} {'blocks':>9}")
+    for rows in args.rows:
+        for agents in args.agents:
+            for r in run(rows, agents, args.repeat):
+                res.append(r)
+                print(f"{rows:>9} {agents:>7} {r['stage']:<40} {r['wall_s']:>9.4f} {r['peak_mb']:>9.1f} "
+                      f"{r['retained_mb']:>9.1f} {r['blocks']:>9}")
+    meta = {"python": platform.python_version(), "pandas": pd.__version__, "machine": platform.machine(),
+            "processor": platform.processor(), "cpus": os.cpu_count(), "at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(args.out, "w") as f:
+        json.dump({"meta": meta, "results": res}, f, indent=1)
+    print(f"wrote {len(res)} results to {args.out}")
+    if args.baseline:
+        slow = compare(res, args.baseline, args.tolerance)
+        for r, was in slow:
+            print(f"REGRESSION {r['rows']} rows / {r['agents']} agents {r['stage']}: {was:.4f}s -> {r['wall_s']:.4f}s")
+        sys.exit(1 if slow else 0)
+
+
+if __name__ == "__main__":
+    main()
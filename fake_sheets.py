@@ -0,0 +1,242 @@
+"""Local stand-in for the Google Sheets API and a synthetic "Form Responses 1"
+generator, so the dashboard can be run, load-tested and profiled offline.
+
+    python fake_sheets.py responses.csv --rows 100000 --agents 200
+    DASHBOARD_SHEETS_FILE=responses.csv streamlit run app.py
+
+FakeService implements the slice of the discovery client the app uses:
+spreadsheets().values().get(...).execute() and batchGet(...), including
+majorDimension and the value/date-time render options. Values are served
+from CSV files: a single .csv answers for every tab, a directory answers
+tab "X" from "X.csv". The CSV text is the formatted view; unformatted reads
+turn numeric cells into numbers and date-time cells into serial day counts.
+Files are re-read when they change, so appending rows to one simulates new
+form submissions.
+"""
+import argparse
+import csv
+import os
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+HEADER = ["Timestamp", "Agent Name", "Transfer to:", "Customer Name:", "Electric Bill:",
+          "Credit Score:", "Status", "FeedBack", "H comments"]
+DESTINATIONS = ["Sales", "Support", "Billing", "Retention", "Solar Team", "Closer Desk", "Verification", "Escalations"]
+# raw Status cells as agents type them: case and whitespace vary, some are blank
+STATUS_MIX = {"Done": 0.38, "done": 0.12, "Done ": 0.05, "Failed": 0.12, "failed": 0.04, "Rejected": 0.05,
+              "Not Done": 0.03, "Pending": 0.12, "In Progress": 0.05, "": 0.04}
+# the Form's own format dominates; the rest are hand-entered or pasted rows
+TS_MIX = {"%m/%d/%Y %H:%M:%S": 0.9, "%m/%d/%Y %H:%M": 0.04, "%Y-%m-%d %H:%M:%S": 0.04, "": 0.01, "bad": 0.01}
+FEEDBACK = ["", "", "", "Customer hung up", "Call back tomorrow", "Wrong number", "Great lead", "Needs manager"]
+
+# text a US-locale sheet stores as a date-time rather than as a string
+DATE_FORMATS = ["%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%Y-%m-%d %H:%M:%S"]
+SERIAL_EPOCH = pd.Timestamp("1899-12-30")  # day 0 of serial date-times
+
+A1 = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def col_index(letters):
+    """A1 column letters -> 0-based index (A -> 0, AA -> 26)."""
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def split_range(rng):
+    """"'Tab'!A2:K" -> ("Tab", "A2:K"); a bare tab name has no cell part."""
+    tab, _, cells = rng.rpartition("!") if "!" in rng else (rng, "", "")
+    return tab.strip("'").replace("''", "'"), cells
+
+
+def trim(r):
+    while r and r[-1] == "": r = r[:-1]
+    return r
+
+
+def cut(values, cells):
+    """The block of `values` an A1 cell range (A2:K, 1:1, A5:C9, ...) selects,
+    trimmed the way the API trims it: no trailing blank cells or rows."""
+    if not cells:
+        block = values
+    else:
+        m = A1.match(cells)
+        if not m: raise ValueError(f"Unable to parse range: {cells}")
+        c0, r0, c1, r1 = m.groups()
+        top = int(r0) - 1 if r0 else 0
+        bottom = int(r1) if r1 else (int(r0) if r0 and c1 is None else len(values))
+        left = col_index(c0) if c0 else 0
+        right = col_index(c1) + 1 if c1 else (left + 1 if c0 and c1 is None else None)
+        block = values[top:bottom]
+        if left or right is not None:
+            block = [trim(r[left:right]) for r in block]
+    block = list(block)
+    while block and not block[-1]: block.pop()
+    return block
+
+
+def columns(block):
+    """A ROWS block as majorDimension=COLUMNS returns it, each column trimmed."""
+    width = max(map(len, block), default=0)
+    cols = [trim([r[i] if i < len(r) else "" for r in block]) for i in range(width)]
+    while cols and not cols[-1]: cols.pop()
+    return cols
+
+
+def unformat(rows, serial=True):
+    """`rows` as valueRenderOption=UNFORMATTED_VALUE returns them: numeric
+    cells as int/float, date-time cells as serial day counts (serial=False:
+    left formatted, as dateTimeRenderOption=FORMATTED_STRING does), text as is."""
+    width = max(map(len, rows), default=0)
+    cols = []
+    for i in range(width):
+        s = pd.Series([r[i] if i < len(r) else "" for r in rows], dtype=object)
+        out = s.to_numpy(copy=True)
+        filled = (s != "").to_numpy()
+        num = pd.to_numeric(s.where(filled), errors="coerce").to_numpy(dtype=float)
+        isnum = ~np.isnan(num)
+        out[isnum] = [int(v) if v.is_integer() else float(v) for v in num[isnum]]
+        if serial:
+            rest = filled & ~isnum & s.str.match(r"\d").fillna(False).to_numpy(dtype=bool)
+            for fmt in DATE_FORMATS:
+                t = pd.to_datetime(s[rest], format=fmt, errors="coerce")
+                ok = t.notna().to_numpy()
+                at = np.flatnonzero(rest)[ok]
+                out[at] = ((t[ok] - SERIAL_EPOCH) / pd.Timedelta(days=1)).tolist()
+                rest[at] = False
+        cols.append(out)
+    return [trim(list(r)) for r in zip(*cols)]
+
+
+class Request:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def execute(self, num_retries=0):
+        return self.fn()
+
+
+class Values:
+    def __init__(self, path):
+        self.path = path
+        self.files = {}  # (path, render) -> (mtime, size, rows)
+        self.calls = []
+
+    def tab(self, name, render="FORMATTED_VALUE"):
+        """Rows of tab `name` as `render` (FORMATTED_VALUE, SERIAL_NUMBER or
+        FORMATTED_STRING, the last two being unformatted reads)."""
+        path = os.path.join(self.path, f"{name}.csv") if os.path.isdir(self.path) else self.path
+        if not os.path.exists(path):
+            raise ValueError(f"Unable to parse range: {name}")
+        st = os.stat(path)
+        hit = self.files.get((path, render))
+        if hit is None or hit[:2] != (st.st_mtime_ns, st.st_size):
+            if render == "FORMATTED_VALUE":
+                with open(path, newline="", encoding="utf-8") as f:
+                    rows = [trim(r) for r in csv.reader(f)]
+            else:
+                rows = unformat(self.tab(name), serial=render == "SERIAL_NUMBER")
+            hit = self.files[(path, render)] = (st.st_mtime_ns, st.st_size, rows)
+        return hit[2]
+
+    def read(self, rng, majorDimension="ROWS", valueRenderOption="FORMATTED_VALUE",
+             dateTimeRenderOption="SERIAL_NUMBER", **kw):
+        tab, cells = split_range(rng)
+        render = dateTimeRenderOption if valueRenderOption == "UNFORMATTED_VALUE" else "FORMATTED_VALUE"
+        block = cut(self.tab(tab, render), cells)
+        return {"range": rng, "majorDimension": majorDimension,
+                "values": columns(block) if majorDimension == "COLUMNS" else block}
+
+    def get(self, spreadsheetId, range, **kw):
+        self.calls.append(("get", range))
+        return Request(lambda: self.read(range, **kw))
+
+    def batchGet(self, spreadsheetId, ranges, **kw):
+        self.calls.append(("batchGet", list(ranges)))
+        return Request(lambda: {"spreadsheetId": spreadsheetId, "valueRanges": [self.read(r, **kw) for r in ranges]})
+
+
+class Spreadsheets:
+    def __init__(self, path):
+        self.vals = Values(path)
+
+    def values(self):
+        return self.vals
+
+
+class FakeService:
+    """Drop-in for build('sheets', 'v4', ...) reading local CSV files."""
+
+    def __init__(self, path):
+        self.sheets = Spreadsheets(path)
+
+    def spreadsheets(self):
+        return self.sheets
+
+
+def pick(rng, mix, n):
+    keys = list(mix)
+    p = np.array([mix[k] for k in keys], dtype=float)
+    return np.array(keys, dtype=object)[rng.choice(len(keys), n, p=p / p.sum())]
+
+
+def generate(rows=10_000, agents=50, destinations=8, days=120, status_mix=None, ts_mix=None,
+             ragged=0.2, end=None, seed=0):
+    """Header plus `rows` synthetic form responses, oldest first, as the
+    Sheets API returns them: all strings, trailing blank cells dropped.
+
+    Agents follow a skewed (Zipf-like) workload over `agents` names and
+    `destinations` names (an int or a list). `status_mix` and `ts_mix` map raw
+    cell values / strftime formats to weights ("bad" in ts_mix writes an
+    unparseable timestamp). A `ragged` share of rows also loses its optional
+    trailing columns. Timestamps are spread over the `days` before `end`."""
+    rng = np.random.default_rng(seed)
+    if isinstance(destinations, int):
+        destinations = (DESTINATIONS + [f"Destination {i + 1}" for i in range(len(DESTINATIONS), destinations)])[:destinations]
+    dests = list(destinations)
+    end = end or datetime.now().replace(microsecond=0)
+    secs = np.sort(rng.integers(0, days * 86400, rows))[::-1]
+    weights = 1 / np.arange(1, agents + 1) ** 0.8
+    who = rng.choice(agents, rows, p=weights / weights.sum())
+    where = rng.integers(0, len(dests), rows)
+    status = pick(rng, status_mix or STATUS_MIX, rows)
+    fmts = pick(rng, ts_mix or TS_MIX, rows)
+    bill, score = rng.integers(40, 700, rows), rng.integers(450, 850, rows)
+    fb = rng.integers(0, len(FEEDBACK), rows)
+    cut_at = np.where(rng.random(rows) < ragged, rng.integers(HEADER.index("Status") + 1, len(HEADER), rows), len(HEADER))
+    out = [list(HEADER)]
+    for i in range(rows):
+        t = end - timedelta(seconds=int(secs[i]))
+        ts = "not a date" if fmts[i] == "bad" else t.strftime(fmts[i]) if fmts[i] else ""
+        r = [ts, f"Agent {who[i] + 1}", dests[where[i]], f"Customer {i + 1}", f"${bill[i]}", str(score[i]),
+             status[i], FEEDBACK[fb[i]], ""][:cut_at[i]]
+        while r and r[-1] == "": r.pop()
+        out.append(r)
+    return out
+
+
+def write(path, values):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(values)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write a synthetic Form Responses 1 sheet to CSV.")
+    ap.add_argument("path")
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--agents", type=int, default=50)
+    ap.add_argument("--destinations", type=int, default=8)
+    ap.add_argument("--days", type=int, default=120)
+    ap.add_argument("--ragged", type=float, default=0.2)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    write(args.path, generate(args.rows, args.agents, args.destinations, args.days, ragged=args.ragged, seed=args.seed))
+    print(f"wrote {args.rows:,} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Test setup: app.py is imported bare (no Streamlit server), reading a
+synthetic "Form Responses 1" sheet through fake_sheets.FakeService. The
+environment has to be in place before the import, so it is set here."""
+import logging
+import os
+import sys
+import tempfile
+import warnings
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SHEET = os.path.join(tempfile.mkdtemp(), "responses.csv")
+os.environ["DASHBOARD_CACHE_DIR"] = tempfile.mkdtemp()
+os.environ["DASHBOARD_SHEETS_FILE"] = SHEET
+for var in ("DASHBOARD_SOURCES", "DASHBOARD_API_PORT", "DASHBOARD_API_TOKEN"):
+    os.environ.pop(var, None)
+warnings.filterwarnings("ignore")
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import fake_sheets  # noqa: E402
+
+ROWS = fake_sheets.generate(3000, 25, seed=1)
+fake_sheets.write(SHEET, ROWS)
+
+
+@pytest.fixture
+def rows():
+    """Header plus the 3000 synthetic responses, oldest first."""
+    return [list(r) for r in ROWS]
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    """write(values, tab) -> the source dict serving `values` as tab `tab`.
+    Writing the same tab again replaces its rows, like edits to the sheet."""
+    def write(values, tab="Form Responses 1"):
+        fake_sheets.write(str(tmp_path / f"{tab}.csv"), values)
+        return {"name": tab, "sid": str(tmp_path), "tab": tab}
+    return write
@@ -0,0 +1,220 @@
+"""Invariants the incremental paths rely on: every shortcut (appended reads,
+merged cubes and trends, merged sources, downsampling, paging, the API's
+304s) must agree with rebuilding from scratch."""
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import uvicorn
+
+import app
+import fake_sheets
+
+
+def ingested(src, svc=None):
+    s = app.ingest_state(src)
+    app.ingest(svc or fake_sheets.FakeService(src["sid"]), s)
+    return s
+
+
+def same_cube(a, b):
+    key = lambda c: c.sort_values(app.CUBE_KEYS, kind="stable").reset_index(drop=True)
+    pd.testing.assert_frame_equal(key(a), key(b), check_categorical=False)
+
+
+def same_trends(a, b):
+    for f in ("D", "W", "M"):
+        pd.testing.assert_series_equal(a[f], b[f], check_names=False, check_freq=False)
+
+
+# ============================================================
+# INGEST
+# ============================================================
+def test_incremental_ingest_matches_full_read(sheet, rows):
+    src = sheet(rows[:2001])
+    svc = fake_sheets.FakeService(src["sid"])
+    s = ingested(src, svc)
+    assert s["rows"] == 2000
+    sheet(rows)
+    app.ingest(svc, s)
+    assert svc.spreadsheets().values().calls[-1] == ("batchGet", ["'Form Responses 1'!1:1", "'Form Responses 1'!A2002:I"])
+    full = ingested(src)
+    assert s["rows"] == full["rows"] == 3000
+    assert s["ts"]["bad"] == full["ts"]["bad"]
+    pd.testing.assert_frame_equal(s["df"], full["df"])
+    same_cube(s["cube"], full["cube"])
+    same_trends(s["trends"], full["trends"])
+
+
+def test_reconcile_keeps_an_unchanged_frame(sheet, rows, monkeypatch):
+    src = sheet(rows)
+    s = ingested(src)
+    df, full_at = s["df"], s["full_at"]
+    monkeypatch.setattr(app, "RECONCILE_EVERY", 0)
+    app.ingest(fake_sheets.FakeService(src["sid"]), s)
+    assert s["df"] is df and s["full_at"] == full_at
+    sheet(rows[:1500] + rows[1501:])  # a deleted response
+    app.ingest(fake_sheets.FakeService(src["sid"]), s)
+    assert s["df"] is not df and s["rows"] == 2999
+    pd.testing.assert_frame_equal(s["df"], ingested(src)["df"])
+
+
+# ============================================================
+# ROLLUPS
+# ============================================================
+@pytest.mark.parametrize("cut", [1, 700, 2999])
+def test_merged_cube_and_trends_match_rebuild(sheet, rows, cut):
+    df = ingested(sheet(rows))["df"]
+    a, b = df.iloc[:cut], df.iloc[cut:]
+    same_cube(app.merge_cubes(app.build_cube(a), app.build_cube(b)), app.build_cube(df))
+    same_trends(app.merge_trends(app.build_trends(a), app.build_trends(b)), app.build_trends(df))
+
+
+def test_merged_sources_match_rebuild(sheet, rows):
+    hdr, body = rows[0], rows[1:]
+    srcs = [sheet([hdr] + body[0::2][:1000], "A"), sheet([hdr] + body[1::2][:1000], "B")]
+    svc = fake_sheets.FakeService(srcs[0]["sid"])
+    m = app.sources_state(srcs)
+    app.fetch_data(svc, m)
+    sheet([hdr] + body[0::2], "A")
+    sheet([hdr] + body[1::2], "B")
+    df = app.fetch_data(svc, m)
+    assert m["rows"] == len(df) == 3000 and m["error"] is None
+    same_cube(m["cube"], app.build_cube(df))
+    same_trends(m["trends"], app.build_trends(df))
+    fresh = app.sources_state(srcs)
+    rebuilt = app.fetch_data(fake_sheets.FakeService(srcs[0]["sid"]), fresh)
+    key = lambda d: d.astype(str).sort_values(list(d.columns)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(key(df), key(rebuilt))
+    assert app.fetch_data(svc, m) is df  # nothing new: the same frame
+
+
+def test_calc_counts_agree_with_rows(sheet, rows):
+    s = ingested(sheet(rows))
+    k = app.calc(s["df"], True, s["cube"], trends=s["trends"])
+    df = s["df"][s["df"]["Timestamp"].notna()]
+    assert k["total"] == len(df)
+    assert k["done"] == int((df["Status"] == "done").sum())
+    assert k["failed"] == int((df["IsFailed"] == True).sum())  # noqa: E712
+    assert k["done"] + k["failed"] + k["pend"] == k["total"]
+    assert int(k["ac"].sum()) == int(k["tc"].sum()) == k["done"]
+    assert app.calc(s["df"], True, trends=s["trends"])["ac"].equals(k["ac"])  # cube-free path agrees
+
+
+# ============================================================
+# CHARTS
+# ============================================================
+def lttb_reference(x, y, n):
+    """Steinarsson's Largest-Triangle-Three-Buckets, point by point."""
+    m = len(y)
+    if n >= m or n < 3: return list(range(m))
+    every = (m - 2) / (n - 2)
+    out, a = [0], 0
+    for i in range(n - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        nhi = min(int((i + 2) * every) + 1, m)
+        ax, ay = np.mean(x[hi:nhi]), np.mean(y[hi:nhi])
+        best, pick = -1.0, lo
+        for j in range(lo, hi):
+            area = abs((x[a] - ax) * (y[j] - y[a]) - (x[a] - x[j]) * (ay - y[a]))
+            if area > best: best, pick = area, j
+        out.append(pick)
+        a = pick
+    return out + [m - 1]
+
+
+@pytest.mark.parametrize("m,n", [(10, 3), (100, 7), (1000, 50), (5000, 1500)])
+def test_lttb_matches_reference(m, n):
+    rng = np.random.default_rng(m)
+    x = np.arange(m, dtype=float)
+    y = rng.normal(size=m).cumsum()
+    assert list(app.lttb(x, y, n)) == lttb_reference(x, y, n)
+
+
+def test_lttb_keeps_short_series():
+    assert list(app.lttb(np.arange(5), np.arange(5), 10)) == [0, 1, 2, 3, 4]
+
+
+# ============================================================
+# PAGING
+# ============================================================
+def test_span_and_sort_positions_match_pandas(sheet, rows):
+    d = ingested(sheet(rows))["df"]
+    d = d[d["Timestamp"].notna()].sort_values("Timestamp", kind="stable").reset_index(drop=True)
+    start = d["Timestamp"].iloc[len(d) // 3].normalize()
+    end = start + timedelta(days=9)
+    inside = d.index[(d["Timestamp"] >= start) & (d["Timestamp"] < end + timedelta(days=1))].to_numpy()
+    assert list(app.span(d, range(len(d)), start, end)) == list(inside)
+    assert list(app.span(d, np.arange(len(d))[::2], start, end)) == [p for p in inside if p % 2 == 0]
+    for col in ("Agent Name", "Status"):
+        for desc in (False, True):
+            got = app.sort_positions(d, inside, col, desc)
+            want = d.loc[inside, col].astype(str).where(d.loc[inside, col].notna(), None)
+            want = want.sort_values(ascending=not desc, kind="stable", na_position="first" if desc else "last")
+            assert list(d.loc[got, col].astype(str)) == list(d.loc[want.index, col].astype(str))
+
+
+# ============================================================
+# API
+# ============================================================
+TOKEN = "test-token"
+
+
+@pytest.fixture(scope="module")
+def api():
+    """Base URL of an Api on a free loopback port over the default sheet."""
+    poller = app.Poller(every=3600)
+    assert poller.snapshot(wait=60)["version"]
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app.Api(poller, TOKEN).app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+
+
+def get(url, **headers):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=30) as r:
+            return r.status, dict(r.headers), r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def test_api_etag_answers_304(api):
+    code, headers, body = get(f"{api}/api/kpis")
+    assert code == 200 and json.loads(body)["total"] > 0
+    assert get(f"{api}/api/kpis", **{"If-None-Match": headers["etag"]})[0] == 304
+    assert get(f"{api}/api/kpis", **{"If-None-Match": '"stale"'})[0] == 200
+
+
+def test_api_admin_and_stream_need_the_token(api):
+    for path in ("/api/kpis?mode=admin", "/api/stream"):
+        code, headers, _ = get(api + path)
+        assert code == 401 and headers["www-authenticate"] == "Bearer"
+        assert get(api + path, Authorization="Bearer wrong")[0] == 401
+    code, _, body = get(f"{api}/api/kpis?mode=admin", Authorization=f"Bearer {TOKEN}")
+    assert code == 200 and "failed_today" in json.loads(body)
+
+
+def test_live_delta_caps_failed_rows(sheet, rows, monkeypatch):
+    monkeypatch.setattr(app, "STREAM_MAX_ROWS", 5)
+    s = ingested(sheet(rows[:1001]))
+    old = app.live_state({"version": 1, "full_at": s["full_at"], "df": s["df"], "cube": s["cube"]})
+    failed = [r[:6] + ["Failed"] + r[7:] for r in rows[1001:1021]]
+    sheet(rows[:1001] + failed)
+    app.ingest(fake_sheets.FakeService(s["src"]["sid"]), s)
+    new = app.live_state({"version": 2, "full_at": s["full_at"], "df": s["df"], "cube": s["cube"]})
+    event, d = app.live_delta(old, new, s["df"])
+    assert event == "delta" and d["failed"] == old["failed"] + 20
+    assert len(d["failed_rows"]) == 5 and d["failed_rows_skipped"] == 15